@@ -4,18 +4,19 @@
 主程序CLI入口
 """
 
+import os
 import sys
 import argparse
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 # 设置Python路径以导入src模块
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.rag_system import RAGSystem, create_rag_system
-from src.exceptions import RAGSystemError, DocumentProcessingError, QueryError
-from src.config import load_config, save_config, get_default_config
+# RAGSystem会导入torch/transformers/qdrant_client，仅在需要的命令中按需导入
+if TYPE_CHECKING:
+    from src.rag_system import RAGSystem
 
 
 def setup_logging(level: str = "INFO") -> None:
@@ -36,6 +37,7 @@ def main():
         description="麒麟操作系统手册RAG检索系统",
         epilog="使用示例:\n"
                "  uv run python main.py ask data/raw/kylions_handle_book.pdf '如何安装软件?'\n"
+               "  uv run python main.py process a.pdf b.pdf --workers 4\n"
                "  uv run python main.py interactive --auto-load\n"
                "  uv run python main.py info",
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -46,6 +48,11 @@ def main():
         '--config', '-c',
         help='配置文件路径 (YAML/JSON格式)'
     )
+    parser.add_argument(
+        '--config-cache',
+        action='store_true',
+        help='缓存解析后的配置文件（$XDG_CACHE_HOME/kylions_rag），文件未修改时跳过解析和验证'
+    )
     parser.add_argument(
         '--log-level', 
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
@@ -77,6 +84,13 @@ def main():
     ask_parser.add_argument('--chunk-size', type=int, help='分片大小')
     ask_parser.add_argument('--overlap', type=int, help='重叠大小')
     
+    # process命令：批量处理文档
+    process_parser = subparsers.add_parser('process', help='批量处理PDF文档（多进程并行解析）')
+    process_parser.add_argument('pdf_path', nargs='+', help='PDF文件路径，可指定多个')
+    process_parser.add_argument('--workers', type=int, help='并行解析的进程数，默认CPU核数-1')
+    process_parser.add_argument('--chunk-size', type=int, help='分片大小')
+    process_parser.add_argument('--overlap', type=int, help='重叠大小')
+    
     # config命令：配置管理
     config_parser = subparsers.add_parser('config', help='配置管理')
     config_subparsers = config_parser.add_subparsers(dest='config_action')
@@ -95,14 +109,13 @@ def main():
     setup_logging(args.log_level)
     
     try:
-        # 初始化RAG系统
-        print("🚀 正在初始化RAG系统...")
+        from src.config import load_config, get_default_config
         
         # 加载配置
         config = None
         if args.config:
             try:
-                config = load_config(args.config)
+                config = load_config(args.config, use_cache=args.config_cache)
                 print(f"📋 已加载配置文件: {args.config}")
             except Exception as e:
                 print(f"❌ 加载配置文件失败: {e}")
@@ -120,20 +133,29 @@ def main():
         if hasattr(args, 'min_score') and args.min_score:
             config['query']['min_score_threshold'] = args.min_score
         
+        # config命令只需要配置，无需初始化模型和向量数据库
+        if args.command == 'config':
+            handle_config_command(config, args)
+            return
+        
+        # 初始化RAG系统
+        print("🚀 正在初始化RAG系统...")
+        from src.rag_system import RAGSystem
+        
         rag_system = RAGSystem(config)
         print("✅ RAG系统初始化完成\n")
         
         # 执行对应命令
         if args.command == 'ask':
             handle_ask_command(rag_system, args)
+        elif args.command == 'process':
+            handle_process_command(rag_system, args)
         elif args.command == 'interactive':
             handle_interactive_mode(rag_system, args)
         elif args.command == 'info':
             handle_info_command(rag_system, args)
         elif args.command == 'clear':
             handle_clear_command(rag_system, args)
-        elif args.command == 'config':
-            handle_config_command(rag_system, args)
             
     except KeyboardInterrupt:
         print("\n\n👋 操作已取消，再见!")
@@ -147,8 +169,10 @@ def main():
 
 
 
-def handle_ask_command(rag_system: RAGSystem, args):
+def handle_ask_command(rag_system: 'RAGSystem', args):
     """处理ask命令：一次性处理文档并查询"""
+    from src.exceptions import DocumentProcessingError, QueryError
+    
     print(f"🤖 智能问答模式")
     print(f"📄 文档: {args.pdf_path}")
     print(f"❓ 问题: {args.question}")
@@ -173,29 +197,55 @@ def handle_ask_command(rag_system: RAGSystem, args):
             print("💡 建议尝试不同的关键词")
             return
         
-        print(f"\n📋 查询结果 (共找到 {len(results)} 条相关内容):")
-        print("=" * 50)
+        # 拼接完整输出后一次写入，避免逐行print产生大量写调用
+        lines = [f"\n📋 查询结果 (共找到 {len(results)} 条相关内容):", "=" * 50]
         
         for i, result in enumerate(results, 1):
-            print(f"\n【结果 {i}】(相似度: {result.score:.3f})")
-            print(f"{result.content}")
+            lines.append(f"\n【结果 {i}】(相似度: {result.score:.3f})")
+            lines.append(result.content)
             
             if result.metadata:
                 chunk_info = result.metadata.get('chunk_index', '未知')
-                print(f"  📍 来源: 分片 {chunk_info}")
+                lines.append(f"  📍 来源: 分片 {chunk_info}")
             
             if i < len(results):
-                print("-" * 40)
+                lines.append("-" * 40)
         
-        print(f"\n🎉 问答完成!")
+        lines.append("\n🎉 问答完成!\n")
+        sys.stdout.write("\n".join(lines))
+        sys.stdout.flush()
         
     except (DocumentProcessingError, QueryError) as e:
         print(f"❌ 操作失败: {e}")
         sys.exit(1)
 
 
-def handle_interactive_mode(rag_system: RAGSystem, args):
+def handle_process_command(rag_system: 'RAGSystem', args):
+    """处理process命令：批量处理文档"""
+    from src.exceptions import DocumentProcessingError
+    
+    print(f"📚 批量处理模式，共 {len(args.pdf_path)} 个文档")
+    print("=" * 50)
+    
+    try:
+        results = rag_system.process_documents(args.pdf_path, workers=args.workers)
+    except DocumentProcessingError as e:
+        print(f"❌ 操作失败: {e}")
+        sys.exit(1)
+    
+    for result in results:
+        print(f"✅ {result['document_path']}")
+        print(f"  📑 处理页数: {result['pages_processed']}")
+        print(f"  🧩 分片数量: {result['chunks_created']}")
+        print(f"  ⏱️  处理时间: {result['processing_time']}")
+    
+    print(f"\n🎉 处理完成，共生成 {rag_system.chunk_count} 个分片")
+
+
+def handle_interactive_mode(rag_system: 'RAGSystem', args):
     """交互模式"""
+    from src.exceptions import QueryError
+    
     print("🎮 进入交互查询模式")
     print("💡 使用说明:")
     print("  - 输入问题进行查询")
@@ -255,11 +305,13 @@ def handle_interactive_mode(rag_system: RAGSystem, args):
                     print("😔 未找到相关内容，请尝试其他关键词\n")
                     continue
                 
-                print(f"\n📋 找到 {len(results)} 条相关内容:")
+                lines = [f"\n📋 找到 {len(results)} 条相关内容:"]
                 for i, result in enumerate(results, 1):
-                    print(f"\n【{i}】{result.content[:200]}...")
-                    print(f"    📊 相似度: {result.score:.3f}")
-                print()
+                    lines.append(f"\n【{i}】{result.content[:200]}...")
+                    lines.append(f"    📊 相似度: {result.score:.3f}")
+                lines.append("\n")
+                sys.stdout.write("\n".join(lines))
+                sys.stdout.flush()
                 
             except QueryError as e:
                 print(f"❌ 查询失败: {e}\n")
@@ -274,12 +326,12 @@ def handle_interactive_mode(rag_system: RAGSystem, args):
             print(f"❌ 发生错误: {e}\n")
 
 
-def handle_info_command(rag_system: RAGSystem, args):
+def handle_info_command(rag_system: 'RAGSystem', args):
     """处理info命令"""
     print_system_info(rag_system, args.detailed)
 
 
-def handle_clear_command(rag_system: RAGSystem, args):
+def handle_clear_command(rag_system: 'RAGSystem', args):
     """处理clear命令"""
     if not args.confirm:
         response = input("⚠️  确定要清空向量数据库吗？这将删除所有已处理的文档数据。[y/N]: ")
@@ -294,21 +346,23 @@ def handle_clear_command(rag_system: RAGSystem, args):
         print(f"❌ 清空失败: {e}")
 
 
-def handle_config_command(rag_system: RAGSystem, args):
+def handle_config_command(config: dict, args):
     """处理config命令"""
     if args.config_action == 'show':
         print("📋 当前配置:")
-        import json
-        print(json.dumps(rag_system.config, indent=2, ensure_ascii=False))
+        from src import _json
+        print(_json.dumps(config, indent=True))
     elif args.config_action == 'save':
+        from src.config import save_config
+        
         try:
-            save_config(rag_system.config, args.output_path)
+            save_config(config, args.output_path)
             print(f"✅ 配置已保存到: {args.output_path}")
         except Exception as e:
             print(f"❌ 保存配置失败: {e}")
 
 
-def print_system_info(rag_system: RAGSystem, detailed: bool = False):
+def print_system_info(rag_system: 'RAGSystem', detailed: bool = False):
     """打印系统信息"""
     info = rag_system.get_system_info()
     
@@ -318,7 +372,7 @@ def print_system_info(rag_system: RAGSystem, detailed: bool = False):
     print(f"  🧩 文档分片数: {info.get('chunk_count', 0)} 个")
     
     if info.get('last_processed_document'):
-        doc_name = Path(info['last_processed_document']).name
+        doc_name = os.path.basename(info['last_processed_document'])
         print(f"  📁 最新文档: {doc_name}")
     
     # 向量存储信息
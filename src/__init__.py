@@ -4,8 +4,15 @@ RAG系统核心模块
 """
 
 from typing import List
-# Import available modules only
-from .embeddings import Embedder, BGEEmbedder, default_embedder, embed_text
+
+
+# 向量化模块会导入sentence_transformers/torch，耗时较长，
+# 因此按需导入，避免 `import src.config` 等轻量操作也付出该代价
+def __getattr__(name: str):
+    if name in __all__:
+        from . import embeddings
+        return getattr(embeddings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # 导出可用的接口
@@ -14,5 +21,6 @@ __all__ = [
     'Embedder',         # 向量化协议
     'BGEEmbedder',      # BGE向量化器实现
     'default_embedder', # 默认向量化器实例
+    'get_default_embedder',  # 获取默认向量化器实例
     'embed_text',       # 便捷向量化函数
 ]
@@ -0,0 +1,47 @@
+"""
+JSON序列化
+优先使用orjson（C实现，速度快数倍），未安装时回退到标准库json
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于运行环境
+    ORJSON_AVAILABLE = False
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """
+    序列化为JSON字符串，非ASCII字符原样保留
+    
+    不缩进时输出紧凑格式。orjson与标准库的输出并非逐字节一致（如浮点数 1e+20 与 1e20），
+    且orjson还能序列化NumPy数组和datetime，需要稳定字节表示（如计算哈希）时应直接使用标准库
+    
+    Args:
+        obj: 待序列化对象
+        indent: 是否使用2空格缩进
+        sort_keys: 是否按键排序，相同内容的字典总是得到相同的字符串
+    
+    Returns:
+        str: JSON字符串
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+
+
+def loads(data: Any) -> Any:
+    """解析JSON字符串或字节串"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
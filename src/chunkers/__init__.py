@@ -47,7 +47,6 @@ from .simple_overlap_chunker import SimpleOverlapChunker
 # 导出公共接口
 __all__ = [
     'DocumentChunker',       # 文档分片器协议
-    'HybridChunker',         # 混合分片策略协议
     'MetadataGenerator',     # 元数据生成器协议
     'SimpleOverlapChunker',  # 简单重叠分片器
 ]
@@ -0,0 +1,47 @@
+"""
+分片区间计算的运行时特化
+针对固定的 (chunk_size, step) 生成常量内联的纯Python实现，供未安装Numba时使用
+"""
+
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+Span = Tuple[int, int, int, int]
+
+_SPANS_TEMPLATE = """
+def _compute_spans(content):
+    n = len(content)
+    spans = [None] * ((n + {step} - 1) // {step})
+    count = 0
+    for start in range(0, n, {step}):
+        end = start + {chunk_size}
+        if end > n:
+            end = n
+        text = content[start:end]
+        stripped_length = len(text.strip())
+        if stripped_length:
+            text_start = start + len(text) - len(text.lstrip())
+            spans[count] = (start, end, text_start, text_start + stripped_length)
+            count += 1
+    del spans[count:]
+    return spans
+"""
+
+
+@lru_cache(maxsize=None)
+def build_span_function(chunk_size: int, step: int) -> Callable[[str], List[Span]]:
+    """
+    生成特化的分片区间计算函数
+    
+    Args:
+        chunk_size: 窗口大小
+        step: 步长（窗口大小减去重叠大小）
+    
+    Returns:
+        Callable[[str], List[Span]]: 输入文本，返回非空分片的
+            (窗口起点, 窗口终点, 去空白后起点, 去空白后终点) 列表
+    """
+    source = _SPANS_TEMPLATE.format(chunk_size=int(chunk_size), step=int(step))
+    namespace = {}
+    exec(compile(source, f"<chunk_spans_{chunk_size}_{step}>", "exec"), namespace)
+    return namespace["_compute_spans"]
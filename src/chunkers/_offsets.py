@@ -0,0 +1,76 @@
+"""
+分片区间计算的Numba JIT内核
+窗口遍历和首尾空白扫描都在内核中完成，只检查窗口两端的字符；
+未安装Numba时分片器改用 _codegen 生成的纯Python实现
+"""
+
+from typing import List
+
+import numpy as np
+
+from ._codegen import Span
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于运行环境
+    NUMBA_AVAILABLE = False
+
+
+# 按码位查表判断空白字符，与 str.isspace() 一致；空白字符均不超过U+3000
+_MAX_SPACE = 0x3000
+_IS_SPACE = np.array([chr(c).isspace() for c in range(_MAX_SPACE + 1)])
+
+
+def _codepoints(content: str) -> np.ndarray:
+    """文本的码位数组，下标与字符串下标一一对应（UTF-32每个码位固定4字节）"""
+    return np.frombuffer(content.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def _compute_spans_kernel(codepoints, is_space, chunk_size, step):
+    n = codepoints.shape[0]
+    max_space = is_space.shape[0] - 1
+    spans = np.empty(((n + step - 1) // step, 4), dtype=np.int64)
+    count = 0
+    for start in range(0, n, step):
+        end = start + chunk_size
+        if end > n:
+            end = n
+        text_start = start
+        while text_start < end and codepoints[text_start] <= max_space and is_space[codepoints[text_start]]:
+            text_start += 1
+        if text_start == end:
+            continue
+        text_end = end
+        while codepoints[text_end - 1] <= max_space and is_space[codepoints[text_end - 1]]:
+            text_end -= 1
+        spans[count, 0] = start
+        spans[count, 1] = end
+        spans[count, 2] = text_start
+        spans[count, 3] = text_end
+        count += 1
+    return spans[:count]
+
+
+if NUMBA_AVAILABLE:
+    _compute_spans_kernel = njit(cache=True)(_compute_spans_kernel)
+
+
+def compute_spans(content: str, chunk_size: int, step: int) -> List[Span]:
+    """
+    计算文本按固定窗口切分后的非空分片区间
+    
+    Args:
+        content: 文档内容
+        chunk_size: 窗口大小
+        step: 步长（窗口大小减去重叠大小）
+    
+    Returns:
+        List[Span]: (窗口起点, 窗口终点, 去空白后起点, 去空白后终点) 列表
+    """
+    if not content:
+        return []
+
+    spans = _compute_spans_kernel(_codepoints(content), _IS_SPACE, np.int64(chunk_size), np.int64(step))
+    # 按列转换后zip直接得到元组，比逐行 tuple() 更快
+    return list(zip(*spans.T.tolist()))
@@ -3,15 +3,18 @@
 使用固定长度重叠分片策略
 """
 
+from collections import ChainMap
 from typing import List, Dict, Any
+
 from ..model import ParsedDocument, DocumentChunk
-from . import DocumentChunker
+from ._codegen import Span, build_span_function
+from ._offsets import NUMBA_AVAILABLE, compute_spans
 
 
-class SimpleOverlapChunker(DocumentChunker):
+class SimpleOverlapChunker:
     """简单重叠分片器
     
-    使用固定长度和重叠量对文档进行分片
+    使用固定长度和重叠量对文档进行分片，按结构实现 DocumentChunker 协议（不继承）
     """
     
     def __init__(self, chunk_size: int = 100, overlap_size: int = 20):
@@ -27,6 +30,12 @@ class SimpleOverlapChunker(DocumentChunker):
         
         if overlap_size >= chunk_size:
             raise ValueError("重叠大小不能大于或等于分片大小")
+        
+        # 未安装Numba时使用针对当前参数生成、常量内联的纯Python实现
+        if NUMBA_AVAILABLE:
+            self._compute_spans = self._compute_spans_windows
+        else:
+            self._compute_spans = build_span_function(chunk_size, chunk_size - overlap_size)
     
     def chunk(self, document: ParsedDocument) -> List[DocumentChunk]:
         """
@@ -39,52 +48,50 @@ class SimpleOverlapChunker(DocumentChunker):
             List[DocumentChunk]: 文档分片列表
         """
         content = document.markdown_content
-        chunks = []
+        content_length = len(content)
         
-        # 计算步长（下一个分片的起始位置）
-        step_size = self.chunk_size - self.overlap_size
+        if content_length == 0:
+            return []
         
-        start = 0
-        chunk_index = 0
+        # 计算去除首尾空白后的分片区间，跳过空分片
+        spans = self._compute_spans(content)
         
-        while start < len(content):
-            # 计算当前分片的结束位置
-            end = min(start + self.chunk_size, len(content))
-            
-            # 提取分片内容
-            chunk_content = content[start:end].strip()
-            
-            # 跳过空分片
-            if not chunk_content:
-                start += step_size
-                continue
-            
-            # 创建分片元数据
-            chunk_metadata = {
-                "chunk_index": chunk_index,
-                "start_position": start,
-                "end_position": end,
-                "chunk_size": len(chunk_content),
-                "overlap_size": self.overlap_size if start > 0 else 0,
-                "source_document": document.metadata.get("source", "unknown")
-            }
-            
-            # 合并原文档的元数据
-            chunk_metadata.update(document.metadata)
-            
-            # 创建DocumentChunk对象
-            chunk = DocumentChunk(
-                content=chunk_content,
-                metadata=chunk_metadata
+        # 原文档元数据只复制一次，所有分片通过ChainMap共享同一份
+        parent_metadata = dict(document.metadata)
+        source = parent_metadata.get("source", "unknown")
+        
+        # 所有分片共享同一份content，只记录各自的区间
+        return [
+            DocumentChunk.from_span(
+                content,
+                text_start,
+                text_end,
+                ChainMap(
+                    {
+                        "chunk_index": chunk_index,
+                        "start_position": start,
+                        "end_position": end,
+                        "chunk_size": text_end - text_start,
+                        "overlap_size": self.overlap_size if start > 0 else 0,
+                        "source_document": source,
+                    },
+                    parent_metadata,
+                )
             )
-            
-            chunks.append(chunk)
-            chunk_index += 1
-            
-            # 移动到下一个分片的起始位置
-            start += step_size
+            for chunk_index, (start, end, text_start, text_end) in enumerate(spans)
+        ]
+    
+    def _compute_spans_windows(self, content: str) -> List[Span]:
+        """
+        基于JIT内核计算非空分片区间，窗口遍历和去空白都不经过Python循环
         
-        return chunks
+        Args:
+            content: 文档内容
+            
+        Returns:
+            List[Span]: (窗口起点, 窗口终点, 去空白后起点, 去空白后终点) 列表
+        """
+        return compute_spans(content, self.chunk_size, self.chunk_size - self.overlap_size)
     
     def get_info(self) -> Dict[str, Any]:
         """
@@ -4,9 +4,18 @@ RAG系统配置管理
 
 from typing import Dict, Any, Optional
 from pathlib import Path
+import hashlib
+import os
+import pickle
 import yaml
-import json
 from .exceptions import ConfigurationError
+from . import _json
+
+
+# 优先使用libyaml的C实现解析和输出YAML
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 
 
 DEFAULT_CONFIG = {
@@ -14,6 +23,8 @@ DEFAULT_CONFIG = {
     'parser': {
         'output_dir': 'data/processed',
         'filter_patterns': None,  # 使用默认过滤模式
+        'preload': False,  # 解析前将整个PDF顺序读入内存
+        'page_workers': 1,  # 单个PDF提取页面文本的进程数，1为不并行
     },
     
     # 分片配置
@@ -24,15 +35,43 @@ DEFAULT_CONFIG = {
     
     # 向量化配置  
     'embedder': {
-        'model_name': 'BAAI/bge-large-zh-v1.5',
+        'model_name': 'BAAI/bge-large-zh-v1.5',  # 也可为本地蒸馏模型目录（见 src/embeddings/distill.py）
         'device': None,  # 自动选择
+        'batch_size': 64,  # 单次前向计算的文本数量
+        'index_batches': 16,  # 建索引时每次交给向量化器的批数，分片按 batch_size*index_batches 切分
+        'precision': 'auto',  # GPU推理精度：auto | fp32 | fp16 | bf16（CPU始终为fp32）
+        'backend': 'torch',  # 推理后端：torch | compile | onnx
+        'quantize': False,  # CPU上对编码器做int8动态量化
+        'query_max_length': 64,  # 查询向量化时的最大token数
+        'token_budget': None,  # 每批填充后的token总数上限，None表示按batch_size固定分批
+        'max_seq_length': None,  # 文本最大token数，超出部分截断，None使用模型默认值
+        'cache_path': None,  # 向量缓存路径（如 'data/cache/embeddings.sqlite'），None表示不缓存
     },
     
     # 检索配置
     'retriever': {
+        'backend': 'qdrant',  # 向量存储后端：'qdrant' | 'sqlite_vec'
+        'sqlite_path': ':memory:',  # sqlite_vec后端的数据库路径
+        'url': None,  # Qdrant服务地址，None表示内存模式
+        'prefer_grpc': True,  # 连接Qdrant服务时优先使用gRPC
+        'grpc_port': 6334,
+        'pool_size': 32,  # Qdrant客户端连接池大小
         'collection_name': 'kylinos_docs',
         'vector_size': 1024,
-        'distance_metric': 'cosine',
+        'distance_metric': 'cosine',  # Qdrant距离度量：cosine | dot | euclid | manhattan
+        'assume_normalized': False,  # 声明向量已归一化，Qdrant余弦距离改用内积计算
+        'datatype': 'float16',  # Qdrant原始向量存储类型：float16 | float32
+        'hnsw_m': 32,  # HNSW每个节点的边数
+        'hnsw_ef_construct': 256,  # HNSW构建时的候选数量
+        'hnsw_ef': 128,  # HNSW检索时的候选数量
+        'full_scan_threshold': 10000,  # 段内向量数据量（KB）低于该值时全量扫描
+        'payload_indexes': [],  # Qdrant payload索引，如 [['metadata.file_name', 'keyword']]
+        'upsert_batch_size': 256,  # 单次写入向量数据库的点数量
+        'upsert_parallel': 1,  # Qdrant并发写入请求数，远程服务时可调大
+        'quantization': None,  # 向量量化：None | 'int8' | 'binary'（仅qdrant）| 'uint8'（仅qdrant，客户端量化）
+        'uint8_range': 0.3,  # 客户端uint8量化的分量区间 [-uint8_range, uint8_range]
+        'rescore': True,  # Qdrant量化检索后用原始向量重排
+        'oversampling': None,  # Qdrant量化检索的候选数量倍数，None时int8为2.0、binary为3.0
     },
     
     # 查询配置
@@ -40,6 +79,10 @@ DEFAULT_CONFIG = {
         'default_top_k': 3,
         'min_score_threshold': 0.1,
         'max_content_length': 1000,  # 结果内容最大长度
+        'embedding_cache_size': 1024,  # 查询向量LRU缓存条目数，0为禁用
+        'cache_size': 0,  # 语义查询缓存条目数，0为禁用（如 256）
+        'cache_threshold': 0.95,  # 缓存命中所需的查询相似度
+        'cache_ttl': 300,  # 缓存条目有效期（秒）
     },
     
     # 日志配置
@@ -50,12 +93,14 @@ DEFAULT_CONFIG = {
 }
 
 
-def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+def load_config(config_path: Optional[str] = None, use_cache: bool = False) -> Dict[str, Any]:
     """
     加载配置文件
     
     Args:
         config_path: 配置文件路径，支持YAML和JSON格式
+        use_cache: 是否缓存解析并验证后的配置（位于 $XDG_CACHE_HOME/kylions_rag，
+                   默认 ~/.cache/kylions_rag），配置文件未修改时直接读取缓存
         
     Returns:
         配置字典
@@ -64,6 +109,7 @@ def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
         ConfigurationError: 配置文件加载失败时
     """
     config = DEFAULT_CONFIG.copy()
+    cache_file = None
     
     if config_path:
         config_file = Path(config_path)
@@ -71,12 +117,19 @@ def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
         if not config_file.exists():
             raise ConfigurationError(f"配置文件不存在: {config_path}")
         
+        # 文件未修改时直接使用上次解析并验证过的结果
+        if use_cache:
+            cache_file = _config_cache_file(config_file)
+            cached_config = _read_config_cache(cache_file)
+            if cached_config is not None:
+                return cached_config
+        
         try:
             with open(config_file, 'r', encoding='utf-8') as f:
                 if config_file.suffix.lower() in ['.yaml', '.yml']:
-                    user_config = yaml.safe_load(f)
+                    user_config = yaml.load(f, Loader=_YamlLoader)
                 elif config_file.suffix.lower() == '.json':
-                    user_config = json.load(f)
+                    user_config = _json.loads(f.read())
                 else:
                     raise ConfigurationError(f"不支持的配置文件格式: {config_file.suffix}")
             
@@ -89,9 +142,54 @@ def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
     # 验证配置
     validate_config(config)
     
+    if cache_file is not None:
+        _write_config_cache(cache_file, config)
+    
     return config
 
 
+def _config_cache_file(config_file: Path) -> Path:
+    """
+    计算配置文件对应的缓存文件路径
+    
+    缓存键包含文件绝对路径、修改时间、文件大小和默认配置内容，
+    任一变化都会使旧缓存失效。
+    """
+    stat = config_file.stat()
+    key = hashlib.sha256(
+        f"{config_file.resolve()}\0{stat.st_mtime_ns}\0{stat.st_size}\0"
+        f"{_json.dumps(DEFAULT_CONFIG)}".encode('utf-8')
+    ).hexdigest()[:32]
+    return _config_cache_dir() / f"config_{key}.pkl"
+
+
+def _config_cache_dir() -> Path:
+    """配置缓存目录，每次调用时读取XDG_CACHE_HOME"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'kylions_rag'
+
+
+def _read_config_cache(cache_file: Path) -> Optional[Dict[str, Any]]:
+    """读取配置缓存，不存在或损坏时返回None"""
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _write_config_cache(cache_file: Path, config: Dict[str, Any]) -> None:
+    """写入配置缓存，失败时忽略（缓存只是加速手段）"""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
 def merge_configs(base_config: Dict[str, Any], user_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     递归合并配置字典
@@ -143,6 +241,74 @@ def validate_config(config: Dict[str, Any]) -> None:
         if vector_size <= 0:
             raise ConfigurationError("向量维度必须大于0")
         
+        backend = config['retriever'].get('backend', 'qdrant')
+        if backend not in ('qdrant', 'sqlite_vec'):
+            raise ConfigurationError(f"不支持的向量存储后端: {backend}")
+        
+        distance_metric = config['retriever'].get('distance_metric', 'cosine')
+        if distance_metric not in ('cosine', 'dot', 'euclid', 'manhattan'):
+            raise ConfigurationError(f"不支持的距离度量: {distance_metric}")
+        
+        if distance_metric != 'cosine' and backend != 'qdrant':
+            raise ConfigurationError(f"{backend}后端仅支持cosine距离度量")
+        
+        quantization = config['retriever'].get('quantization')
+        if quantization not in (None, 'int8', 'binary', 'uint8'):
+            raise ConfigurationError(f"不支持的向量量化方式: {quantization}")
+        
+        if config['retriever'].get('datatype', 'float16') not in ('float16', 'float32'):
+            raise ConfigurationError(f"不支持的向量存储类型: {config['retriever']['datatype']}")
+        
+        if quantization in ('binary', 'uint8') and backend != 'qdrant':
+            raise ConfigurationError(f"{quantization}量化仅支持qdrant后端")
+        
+        if config['retriever'].get('uint8_range', 0.3) <= 0:
+            raise ConfigurationError("uint8量化区间必须大于0")
+        
+        oversampling = config['retriever'].get('oversampling')
+        if oversampling is not None and oversampling < 1:
+            raise ConfigurationError("量化检索的候选倍数不能小于1")
+        
+        # 验证批处理配置
+        if config['embedder'].get('batch_size', 64) <= 0:
+            raise ConfigurationError("向量化批大小必须大于0")
+        
+        if config['embedder'].get('index_batches', 16) < 1:
+            raise ConfigurationError("建索引时每次向量化的批数必须大于0")
+        
+        if config['embedder'].get('query_max_length', 64) <= 2:
+            raise ConfigurationError("查询最大token数必须大于2")
+        
+        max_seq_length = config['embedder'].get('max_seq_length')
+        if max_seq_length is not None and max_seq_length <= 2:
+            raise ConfigurationError("文本最大token数必须大于2")
+        
+        token_budget = config['embedder'].get('token_budget')
+        if token_budget is not None and token_budget <= 0:
+            raise ConfigurationError("向量化token预算必须大于0")
+        
+        if config['embedder'].get('precision', 'auto') not in ('auto', 'fp32', 'fp16', 'bf16'):
+            raise ConfigurationError(f"不支持的推理精度: {config['embedder']['precision']}")
+        
+        if config['embedder'].get('backend', 'torch') not in ('torch', 'compile', 'onnx'):
+            raise ConfigurationError(f"不支持的推理后端: {config['embedder']['backend']}")
+        
+        for key in ('hnsw_m', 'hnsw_ef_construct', 'hnsw_ef'):
+            if key in config['retriever'] and config['retriever'][key] <= 0:
+                raise ConfigurationError(f"{key} 必须大于0")
+        
+        if config['retriever'].get('pool_size', 32) <= 0:
+            raise ConfigurationError("连接池大小必须大于0")
+        
+        if config['retriever'].get('upsert_parallel', 1) <= 0:
+            raise ConfigurationError("并发写入请求数必须大于0")
+        
+        if config['retriever'].get('upsert_batch_size', 256) <= 0:
+            raise ConfigurationError("向量写入批大小必须大于0")
+        
+        if config['parser'].get('page_workers', 1) < 1:
+            raise ConfigurationError("页面文本提取进程数必须大于0")
+        
         # 验证查询配置
         top_k = config['query']['default_top_k']
         if top_k <= 0:
@@ -151,6 +317,16 @@ def validate_config(config: Dict[str, Any]) -> None:
         min_score = config['query']['min_score_threshold']
         if min_score < 0 or min_score > 1:
             raise ConfigurationError("最小相似度阈值必须在0-1之间")
+        
+        if config['query'].get('embedding_cache_size', 0) < 0:
+            raise ConfigurationError("查询向量缓存条目数不能为负数")
+        
+        if config['query'].get('cache_size', 0) < 0:
+            raise ConfigurationError("查询缓存条目数不能为负数")
+        
+        cache_threshold = config['query'].get('cache_threshold', 0.95)
+        if cache_threshold <= 0 or cache_threshold > 1:
+            raise ConfigurationError("查询缓存相似度阈值必须在0-1之间")
             
     except KeyError as e:
         raise ConfigurationError(f"配置缺少必要字段: {e}") from e
@@ -179,9 +355,9 @@ def save_config(config: Dict[str, Any], config_path: str) -> None:
         
         with open(config_file, 'w', encoding='utf-8') as f:
             if config_file.suffix.lower() in ['.yaml', '.yml']:
-                yaml.safe_dump(config, f, default_flow_style=False, allow_unicode=True)
+                yaml.dump(config, f, Dumper=_YamlDumper, default_flow_style=False, allow_unicode=True)
             elif config_file.suffix.lower() == '.json':
-                json.dump(config, f, ensure_ascii=False, indent=2)
+                f.write(_json.dumps(config, indent=True))
             else:
                 raise ConfigurationError(f"不支持的配置文件格式: {config_file.suffix}")
                 
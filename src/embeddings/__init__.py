@@ -4,21 +4,37 @@
 """
 
 from typing import Protocol, List, Union
-from .bge_embedder import BGEEmbedder, default_embedder, embed_text
+
+import numpy as np
+
+from .bge_embedder import BGEEmbedder, get_default_embedder, embed_text
+from .cache import EmbeddingCache
 
 
 class Embedder(Protocol):
     """BGE中文向量化器协议接口"""
     
-    def embed(self, texts: Union[str, List[str]]) -> List[List[float]]:
-        """继承自EmbeddingModel的向量化方法"""
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """对文本进行向量化，返回 (文本数, 向量维度) 的矩阵"""
+        ...
+    
+    def embed_query(self, text: str, max_length: int = 64) -> np.ndarray:
+        """向量化单条查询，返回1维向量"""
         ...
 
 
+def __getattr__(name: str):
+    if name == 'default_embedder':
+        return get_default_embedder()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # 导出公共接口
 __all__ = [
     'Embedder',         # 向量化模型协议
     'BGEEmbedder',      # BGE向量化器实现
-    'default_embedder', # 默认BGE向量化器实例
+    'default_embedder', # 默认BGE向量化器实例（首次访问时创建）
+    'get_default_embedder',  # 获取默认BGE向量化器实例
     'embed_text',       # 便捷向量化函数
+    'EmbeddingCache',   # 向量缓存
 ]
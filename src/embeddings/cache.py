@@ -0,0 +1,110 @@
+"""
+向量缓存
+以 SHA-256(命名空间 + 文本) 为键，将向量持久化到sqlite，避免重复向量化相同文本
+"""
+
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+# 单条SQL中IN子句的参数上限（低于sqlite默认的999）
+_QUERY_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    基于sqlite的向量缓存
+    
+    向量以float16存储，磁盘占用减半，读取时还原为float32。
+    缓存读写失败只记录警告，不影响正常向量化流程。
+    """
+    
+    def __init__(self, path: str = "data/cache/embeddings.sqlite"):
+        """
+        初始化向量缓存
+        
+        Args:
+            path: sqlite数据库文件路径
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb (hash BLOB PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        
+        logger.info(f"Embedding cache opened at: {self.path}")
+    
+    @staticmethod
+    def make_key(namespace: str, text: str) -> bytes:
+        """
+        计算缓存键，命名空间参与哈希
+        
+        命名空间由向量化器给出（模型名及精度、后端、量化、最大长度等设置），
+        不同模型或设置产生的向量互不干扰
+        """
+        return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).digest()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        批量查询缓存
+        
+        Args:
+            keys: 缓存键列表
+        
+        Returns:
+            命中的 键 -> float32向量 映射
+        """
+        found: Dict[bytes, np.ndarray] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        
+        try:
+            for start in range(0, len(unique_keys), _QUERY_BATCH):
+                batch = unique_keys[start:start + _QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM emb WHERE hash IN ({placeholders})", batch
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return {}
+        
+        return found
+    
+    def put_many(self, items: Iterable[tuple]) -> None:
+        """
+        批量写入缓存
+        
+        Args:
+            items: (缓存键, 向量) 二元组序列
+        """
+        rows = [
+            (key, np.asarray(vec, dtype=np.float16).tobytes())
+            for key, vec in items
+        ]
+        if not rows:
+            return
+        
+        try:
+            self._conn.executemany("INSERT OR REPLACE INTO emb (hash, vec) VALUES (?, ?)", rows)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+    
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+    
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._conn.close()
@@ -0,0 +1,120 @@
+"""
+BGE模型蒸馏工具
+将24层的 bge-large-zh-v1.5 蒸馏为层数更少的学生模型，输出维度保持1024，
+生成的模型目录可直接作为 embedder.model_name 使用
+
+用法:
+    python -m src.embeddings.distill data/raw/kylions_handle_book.pdf models/bge-large-zh-8l
+"""
+
+import argparse
+import copy
+import logging
+from typing import List
+
+import numpy as np
+import torch
+from sentence_transformers import InputExample, SentenceTransformer, losses
+from torch.utils.data import DataLoader
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_student(teacher: SentenceTransformer, num_layers: int = 8) -> SentenceTransformer:
+    """
+    从教师模型复制出学生模型，只保留均匀间隔的若干Transformer层（含首层和末层）
+
+    Args:
+        teacher: 教师模型
+        num_layers: 学生模型保留的层数
+
+    Returns:
+        SentenceTransformer: 学生模型
+    """
+    student = copy.deepcopy(teacher)
+    auto_model = student[0].auto_model
+    layers = auto_model.encoder.layer
+
+    if not 0 < num_layers <= len(layers):
+        raise ValueError(f"学生模型层数必须在1到{len(layers)}之间")
+
+    keep = np.unique(np.linspace(0, len(layers) - 1, num_layers).round().astype(int)).tolist()
+    auto_model.encoder.layer = torch.nn.ModuleList([layers[i] for i in keep])
+    auto_model.config.num_hidden_layers = len(keep)
+
+    logger.info(f"Student keeps teacher layers: {keep}")
+    return student
+
+
+def distill_teacher_student(texts: List[str], output_path: str,
+                            teacher_name: str = "BAAI/bge-large-zh-v1.5",
+                            num_layers: int = 8, epochs: int = 1,
+                            batch_size: int = 32, device: str = None) -> str:
+    """
+    以教师模型的句向量为目标，用MSE损失训练学生模型
+
+    Args:
+        texts: 训练文本，通常为目标语料的文档分片
+        output_path: 学生模型保存目录
+        teacher_name: 教师模型名称
+        num_layers: 学生模型层数
+        epochs: 训练轮数
+        batch_size: 训练批大小
+        device: 运行设备，None表示自动选择
+
+    Returns:
+        str: 学生模型保存目录
+    """
+    if not texts:
+        raise ValueError("Distillation texts cannot be empty")
+
+    teacher = SentenceTransformer(teacher_name, device=device)
+    student = build_student(teacher, num_layers)
+
+    logger.info(f"Encoding {len(texts)} texts with teacher model")
+    targets = teacher.encode(texts, batch_size=batch_size, normalize_embeddings=True,
+                             show_progress_bar=True)
+
+    examples = [InputExample(texts=[text], label=target) for text, target in zip(texts, targets)]
+    loader = DataLoader(examples, shuffle=True, batch_size=batch_size)
+    student.fit(
+        train_objectives=[(loader, losses.MSELoss(model=student))],
+        epochs=epochs,
+        show_progress_bar=True
+    )
+
+    student.save(output_path)
+    logger.info(f"Distilled student model saved to {output_path}")
+    return output_path
+
+
+def main() -> None:
+    """命令行入口：以PDF文档分片为训练语料进行蒸馏"""
+    from ..config import get_default_config
+    from ..rag_system import parse_and_chunk
+
+    parser = argparse.ArgumentParser(description="蒸馏BGE向量化模型")
+    parser.add_argument("pdf_path", nargs="+", help="用作训练语料的PDF文件")
+    parser.add_argument("output_path", help="学生模型保存目录")
+    parser.add_argument("--teacher", default="BAAI/bge-large-zh-v1.5", help="教师模型名称")
+    parser.add_argument("--layers", type=int, default=8, help="学生模型层数")
+    parser.add_argument("--epochs", type=int, default=1, help="训练轮数")
+    parser.add_argument("--batch-size", type=int, default=32, help="训练批大小")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = get_default_config()
+    texts = []
+    for pdf_path in args.pdf_path:
+        chunks, _ = parse_and_chunk(pdf_path, config)
+        texts.extend(chunk.content for chunk in chunks)
+
+    distill_teacher_student(texts, args.output_path, teacher_name=args.teacher,
+                            num_layers=args.layers, epochs=args.epochs,
+                            batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
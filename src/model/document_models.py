@@ -2,11 +2,15 @@
 文档相关数据模型
 """
 
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from collections import ChainMap
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Union
 
+import numpy as np
 
-class ParsedDocument(BaseModel):
+
+@dataclass(slots=True)
+class ParsedDocument:
     """解析后的文档数据模型"""
     markdown_content: str
     images: List[Dict[str, Any]]
@@ -14,8 +18,85 @@ class ParsedDocument(BaseModel):
     metadata: Dict[str, Any]
 
 
-class DocumentChunk(BaseModel):
-    """文档分片数据模型"""
-    content: str
-    metadata: Dict[str, Any]
-    embedding: Optional[List[float]] = None
+@dataclass(slots=True, init=False, repr=False, eq=False)
+class DocumentChunk:
+    """文档分片数据模型
+    
+    metadata 可以是普通字典，也可以是 ChainMap（分片字段在前，
+    原文档元数据在后），后者让同一文档的所有分片共享一份原文档元数据
+    
+    content 以 (源文本, 起始, 结束) 视图的形式保存，同一文档的所有分片
+    共享一份源文本，访问时才切片生成字符串
+    
+    每个文档会创建成千上万个分片，因此使用不做校验的 slots 数据类。
+    相等比较和 repr 按 content、metadata、embedding 进行，与源文本视图无关
+    """
+    metadata: Union[ChainMap, Dict[str, Any]]
+    # 向量列表或NumPy数组；入库时通常直接传入整批向量矩阵，不逐个赋值
+    embedding: Optional[Any] = None
+    
+    _source: str = ""
+    _start: int = 0
+    _end: int = 0
+    
+    # 可变对象，与dataclass默认的eq行为一致，不可哈希
+    __hash__ = None
+    
+    def __init__(self, content: str = "", metadata: Union[ChainMap, Dict[str, Any]] = None,
+                 embedding: Optional[Any] = None):
+        self.metadata = {} if metadata is None else metadata
+        self.embedding = embedding
+        self._source = content
+        self._start = 0
+        self._end = len(content)
+    
+    @classmethod
+    def from_span(cls, source: str, start: int, end: int,
+                  metadata: Union[ChainMap, Dict[str, Any]]) -> "DocumentChunk":
+        """
+        创建引用源文本 [start, end) 区间的分片，不复制文本
+        
+        Args:
+            source: 源文本
+            start: 起始位置
+            end: 结束位置
+            metadata: 分片元数据
+        """
+        chunk = cls(metadata=metadata)
+        chunk._source = source
+        chunk._start = start
+        chunk._end = end
+        return chunk
+    
+    @property
+    def content(self) -> str:
+        """分片文本内容"""
+        return self._source[self._start:self._end]
+    
+    @content.setter
+    def content(self, value: str) -> None:
+        self._source = value
+        self._start = 0
+        self._end = len(value)
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DocumentChunk):
+            return NotImplemented
+        if self.content != other.content or self.metadata != other.metadata:
+            return False
+        # embedding可能是NumPy数组，不能直接用 == 得到布尔值
+        if self.embedding is None or other.embedding is None:
+            return self.embedding is None and other.embedding is None
+        return bool(np.array_equal(self.embedding, other.embedding))
+    
+    def __repr__(self) -> str:
+        return (f"DocumentChunk(content={self.content!r}, metadata={dict(self.metadata)!r}, "
+                f"embedding={self.embedding!r})")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（content 展开为字符串）"""
+        return {
+            "content": self.content,
+            "metadata": dict(self.metadata),
+            "embedding": self.embedding,
+        }
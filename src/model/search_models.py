@@ -2,11 +2,12 @@
 检索相关数据模型
 """
 
+from dataclasses import dataclass
 from typing import Dict, Any
-from pydantic import BaseModel
 
 
-class SearchResult(BaseModel):
+@dataclass(slots=True)
+class SearchResult:
     """检索结果数据模型"""
     content: str
     metadata: Dict[str, Any]
@@ -3,18 +3,17 @@
 提供PDF文档解析的接口定义
 """
 
-from typing import Protocol, List, Dict, Any, Union
+from typing import Protocol, Dict, Any
 
-# 导入数据模型
-try:
-    from ..model import ParsedDocument
-except ImportError:
-    # 如果相对导入失败，尝试绝对导入
-    from src.model import ParsedDocument
+from ..model import ParsedDocument
+from .simple_pdf_parser import SimplePDFParser
 
 
 class DocumentParser(Protocol):
-    """文档解析器协议接口 - 使用 Protocol 实现结构化子类型"""
+    """文档解析器协议接口 - 使用 Protocol 实现结构化子类型
+    
+    项目中不对协议做 isinstance 检查，因此不标记 runtime_checkable
+    """
     
     def parse(self, document_path: str) -> ParsedDocument:
         """
@@ -29,10 +28,6 @@ class DocumentParser(Protocol):
         ...
 
 
-# 导入具体实现
-from .simple_pdf_parser import SimplePDFParser
-
-
 class ImageProcessor(Protocol):
     """图片处理器协议接口"""
     
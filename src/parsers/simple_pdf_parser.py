@@ -3,9 +3,12 @@
 只处理文字部分，不处理图片和表格
 """
 
+import io
 import os
 import re
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import List, Dict, Any, Iterator
 from pathlib import Path
 
 import fitz  # PyMuPDF
@@ -13,6 +16,34 @@ from loguru import logger
 from ..model.document_models import ParsedDocument
 
 
+# 页数少于该值时并行提取的进程开销大于收益
+_MIN_PARALLEL_PAGES = 16
+
+
+def _page_text_blocks(page: fitz.Page) -> List[str]:
+    """
+    提取页面中非空文字块的文本
+    
+    get_text("blocks") 返回 (x0, y0, x1, y1, text, block_no, block_type)，
+    block_type为1的图片块直接跳过
+    """
+    return [block[4] for block in page.get_text("blocks") if block[6] == 0 and block[4].strip()]
+
+
+def _extract_page_range(document_path: str, start: int, stop: int) -> List[List[str]]:
+    """
+    在独立进程中打开PDF并提取 [start, stop) 页的文字块
+    
+    PyMuPDF不支持多线程，且提取文本时持有GIL，并行提取只能在多进程中
+    各自打开文档进行
+    """
+    doc = fitz.open(document_path)
+    try:
+        return [_page_text_blocks(doc.load_page(page_num)) for page_num in range(start, stop)]
+    finally:
+        doc.close()
+
+
 class SimplePDFParser:
     """
     简单PDF解析器
@@ -24,16 +55,25 @@ class SimplePDFParser:
     4. 不处理图片和表格
     """
     
-    def __init__(self, output_dir: str = "data/processed", filter_patterns: List[str] = None):
+    # 标题检测规则
+    _NUMBERED_HEADING_RE = re.compile(r'^\d+\.\s+')
+    _HEADING_KEYWORDS = ('第', '章', '节', '条', '款', '项')
+    
+    def __init__(self, output_dir: str = "data/processed", filter_patterns: List[str] = None,
+                 preload: bool = False, page_workers: int = 1):
         """
         初始化解析器
         
         Args:
             output_dir: 输出目录路径
             filter_patterns: 自定义过滤模式列表（可选）
+            preload: 是否先将整个PDF顺序读入内存再解析，避免解析时的大量随机小读
+            page_workers: 提取页面文本的进程数，1表示在当前进程中顺序提取
         """
         self.output_dir = Path(output_dir)
         self.markdown_dir = self.output_dir / "markdown"
+        self.preload = preload
+        self.page_workers = page_workers
         
         # 创建输出目录
         self.markdown_dir.mkdir(parents=True, exist_ok=True)
@@ -41,6 +81,12 @@ class SimplePDFParser:
         # 设置过滤模式
         self.filter_patterns = filter_patterns or self._get_default_filter_patterns()
         
+        # 所有过滤模式合并为一个预编译的正则，每行只需一次匹配
+        self._filter_re = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.filter_patterns),
+            re.IGNORECASE
+        )
+        
         logger.info(f"简单PDF解析器初始化完成，输出目录: {self.output_dir}")
         logger.info(f"已配置 {len(self.filter_patterns)} 个过滤模式")
     
@@ -57,14 +103,17 @@ class SimplePDFParser:
         if not os.path.exists(document_path):
             raise FileNotFoundError(f"PDF文件不存在: {document_path}")
         
-        logger.info(f"开始解析PDF文件: {document_path}")
+        logger.info("开始解析PDF文件: {}", document_path)
         
         try:
             # 打开PDF文档
-            doc = fitz.open(document_path)
+            if self.preload:
+                doc = fitz.open(stream=self._read_file(document_path), filetype="pdf")
+            else:
+                doc = fitz.open(document_path)
             
             # 提取文本内容
-            markdown_content = self._extract_text_to_markdown(doc)
+            markdown_content = self._extract_text_to_markdown(doc, document_path)
             
             # 提取元数据
             metadata = self._extract_metadata(doc, document_path)
@@ -80,7 +129,7 @@ class SimplePDFParser:
                 metadata=metadata
             )
             
-            logger.info(f"PDF解析完成，共处理 {metadata.get('page_count', 0)} 页")
+            logger.info("PDF解析完成，共处理 {} 页", metadata.get('page_count', 0))
             
             return parsed_document
             
@@ -88,55 +137,110 @@ class SimplePDFParser:
             logger.error(f"PDF解析失败: {str(e)}")
             raise
     
-    def _extract_text_to_markdown(self, doc: fitz.Document) -> str:
+    @staticmethod
+    def _read_file(file_path: str) -> bytearray:
+        """
+        一次性顺序读取整个文件
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            bytearray: 文件内容
+        """
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            # Linux上提示内核按顺序预读，加大readahead窗口
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+            
+            buffer = bytearray(size)
+            view = memoryview(buffer)
+            offset = 0
+            while offset < size:
+                read = os.readv(fd, [view[offset:]])
+                if read == 0:
+                    break
+                offset += read
+            return buffer[:offset] if offset < size else buffer
+        finally:
+            os.close(fd)
+    
+    def _extract_text_to_markdown(self, doc: fitz.Document, document_path: str) -> str:
         """
         提取PDF文本并转换为Markdown格式
         
         Args:
             doc: PyMuPDF文档对象
+            document_path: PDF文件路径（多进程提取时各进程据此打开文档）
             
         Returns:
             str: Markdown格式的文本内容
         """
-        markdown_lines = []
+        buffer = io.StringIO()
         
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            
-            # 提取页面文本
-            text = page.get_text()
-            
-            if not text.strip():
+        for page_num, blocks in enumerate(self._iter_page_blocks(doc, document_path), 1):
+            # 没有文字块的页面（空白页、纯图片页）直接跳过
+            if not blocks:
                 continue
             
-            # 处理页面文本并添加到结果中
-            processed_lines = self._process_page_text(text, page_num + 1)
-            markdown_lines.extend(processed_lines)
+            # 处理页面文本并直接写入结果缓冲区
+            self._write_page_text(buffer, blocks, page_num)
         
-        return "\n".join(markdown_lines)
+        return buffer.getvalue()
     
-    def _process_page_text(self, text: str, page_num: int) -> List[str]:
+    def _iter_page_blocks(self, doc: fitz.Document, document_path: str) -> Iterator[List[str]]:
         """
-        处理单页文本内容
+        按页序产出每页的文字块文本
+        
+        page_workers大于1且页数足够多时，将页面按连续区间分给多个进程提取；
+        过滤和格式化仍在当前进程中按页序进行
         
         Args:
-            text: 原始文本
-            page_num: 页码
+            doc: PyMuPDF文档对象
+            document_path: PDF文件路径
             
         Returns:
-            List[str]: 处理后的文本行列表
+            Iterator[List[str]]: 每页的文字块文本列表
         """
-        lines = []
+        page_count = len(doc)
+        workers = min(self.page_workers, page_count // _MIN_PARALLEL_PAGES)
+        
+        if workers <= 1:
+            for page_num in range(page_count):
+                # 提取页面文字块
+                yield _page_text_blocks(doc.load_page(page_num))
+            return
         
+        bounds = [page_count * i // workers for i in range(workers + 1)]
+        logger.info("使用 {} 个进程并行提取 {} 页文本", workers, page_count)
         
-        # 按行处理文本
-        text_lines = text.split('\n')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from chain.from_iterable(
+                executor.map(_extract_page_range, [document_path] * workers, bounds[:-1], bounds[1:])
+            )
+    
+    def _write_page_text(self, buffer: io.StringIO, blocks: List[str], page_num: int) -> None:
+        """
+        处理单页文本内容，逐行写入缓冲区（每行以换行符结尾）
         
-        for line in text_lines:
-            line = line.strip()
+        Args:
+            buffer: 输出缓冲区
+            blocks: 页面文字块文本，只在块内按行切分
+            page_num: 页码
+        """
+        write = buffer.write
+        
+        # 按行处理文本，每行只strip一次。文字块均以换行符结尾，
+        # 用splitlines切分，不会在每个块后多出一个空行
+        for line in chain.from_iterable(block.splitlines() for block in blocks):
+            if not (line := line.strip()):
+                write("\n")
+                continue
             
-            if not line:
-                lines.append("")
+            # 过短的无意义行直接跳过，无需正则匹配和标题检测
+            if len(line) < 3:
                 continue
             
             # 过滤重复的页眉页脚模式
@@ -145,11 +249,12 @@ class SimplePDFParser:
             
             # 简单的标题检测（基于字体大小和位置，这里用简化逻辑）
             if self._is_likely_heading(line):
-                lines.append(f"### {line}")
-            else:
-                lines.append(line)
+                write("### ")
+            write(line)
+            write("\n")
         
-        return lines
+        # 与按行切分整页文本（get_text()以换行符结尾）一致，每页末尾保留一个空行
+        write("\n")
     
     def _is_likely_heading(self, line: str) -> bool:
         """
@@ -161,21 +266,13 @@ class SimplePDFParser:
         Returns:
             bool: 是否为标题
         """
-        # 简单的标题判断规则
-        if len(line) < 50 and line.isupper():
-            return True
-        
-        # 检查是否以数字开头（如：1. 2. 等）
-        if re.match(r'^\d+\.\s+', line):
-            return True
-        
-        # 检查是否以常见标题关键词开头
-        heading_keywords = ['第', '章', '节', '条', '款', '项']
-        for keyword in heading_keywords:
-            if line.startswith(keyword):
-                return True
-        
-        return False
+        # 简单的标题判断规则：短的全大写行、以数字编号开头（如：1. 2. 等）、
+        # 或以常见标题关键词开头
+        return (
+            (len(line) < 50 and line.isupper())
+            or self._NUMBERED_HEADING_RE.match(line) is not None
+            or line.startswith(self._HEADING_KEYWORDS)
+        )
     
     def _get_default_filter_patterns(self) -> List[str]:
         """
@@ -211,21 +308,13 @@ class SimplePDFParser:
         判断是否应该过滤掉这一行
         
         Args:
-            line: 文本行
+            line: 已去除首尾空白的文本行
             
         Returns:
             bool: 是否应该过滤
         """
-        # 检查是否匹配任何过滤模式
-        for pattern in self.filter_patterns:
-            if re.match(pattern, line, re.IGNORECASE):
-                return True
-        
-        # 过滤掉过短的无意义行
-        if len(line.strip()) < 3:
-            return True
-        
-        return False
+        # 过滤掉过短的无意义行，以及匹配任何过滤模式的行
+        return len(line) < 3 or self._filter_re.match(line) is not None
     
     def _extract_metadata(self, doc: fitz.Document, file_path: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,121 @@
+"""
+语义查询缓存
+按查询向量的余弦相似度匹配近似问题（如"如何安装软件?"与"怎么装软件?"），
+命中时直接返回缓存的检索结果，跳过向量检索和结果后处理
+"""
+
+from collections import OrderedDict
+from dataclasses import replace
+from typing import List, Optional, Tuple
+import logging
+import time
+
+import numpy as np
+
+from .model import SearchResult
+
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticQueryCache:
+    """
+    基于查询向量的LRU语义缓存
+    
+    缓存的查询向量存放在一个定长矩阵中，查找时一次矩阵乘法得到与所有缓存
+    查询的内积（向量已归一化，即余弦相似度）。容量满时淘汰最久未使用的条目，
+    超过TTL的条目在查找时失效。
+    """
+    
+    def __init__(self, capacity: int = 256, threshold: float = 0.95, ttl: float = 300.0):
+        """
+        初始化语义缓存
+        
+        Args:
+            capacity: 最大缓存条目数
+            threshold: 命中所需的最小余弦相似度
+            ttl: 条目有效期（秒）
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        
+        self._vectors: Optional[np.ndarray] = None
+        # 槽位 -> (top_k, 检索结果, 写入时间)，按使用顺序排列，最久未使用的在前
+        self._entries: "OrderedDict[int, Tuple[int, List[SearchResult], float]]" = OrderedDict()
+    
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def _expire(self, now: float) -> None:
+        """移除过期条目"""
+        expired = [slot for slot, (_, _, created) in self._entries.items() if now - created > self.ttl]
+        for slot in expired:
+            del self._entries[slot]
+    
+    def get(self, embedding, top_k: int) -> Optional[List[SearchResult]]:
+        """
+        查找语义相近的缓存查询
+        
+        Args:
+            embedding: 查询向量
+            top_k: 返回结果数量，只匹配相同top_k的缓存条目
+        
+        Returns:
+            命中时返回缓存结果的副本，否则返回None
+        """
+        self._expire(time.monotonic())
+        if not self._entries:
+            return None
+        
+        slots = np.fromiter(self._entries.keys(), dtype=np.int64, count=len(self._entries))
+        scores = self._vectors[slots] @ self._normalize(embedding)
+        
+        for i in np.argsort(-scores):
+            if scores[i] < self.threshold:
+                break
+            
+            slot = int(slots[i])
+            cached_top_k, results, _ = self._entries[slot]
+            if cached_top_k == top_k:
+                self._entries.move_to_end(slot)
+                logger.debug("Semantic cache hit (similarity=%.4f)", scores[i])
+                return [replace(result) for result in results]
+        
+        return None
+    
+    def put(self, embedding, top_k: int, results: List[SearchResult]) -> None:
+        """
+        写入缓存
+        
+        Args:
+            embedding: 查询向量
+            top_k: 返回结果数量
+            results: 检索结果
+        """
+        vector = self._normalize(embedding)
+        if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+            self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            self._entries.clear()
+        
+        if len(self._entries) < self.capacity:
+            used = set(self._entries)
+            slot = next(i for i in range(self.capacity) if i not in used)
+        else:
+            slot, _ = self._entries.popitem(last=False)
+        
+        self._vectors[slot] = vector
+        self._entries[slot] = (top_k, [replace(result) for result in results], time.monotonic())
+    
+    def clear(self) -> None:
+        """清空缓存（文档重新入库或清空数据库时调用）"""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -3,16 +3,29 @@ RAG系统主控制器
 封装文档解析、分片、向量化、存储和检索的完整流程
 """
 
+import os
 import time
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+import multiprocessing
+import unicodedata
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
+from qdrant_client.models import Distance
+
 from .parsers.simple_pdf_parser import SimplePDFParser
 from .embeddings.bge_embedder import BGEEmbedder
+from .embeddings.cache import EmbeddingCache
 from .chunkers.simple_overlap_chunker import SimpleOverlapChunker
 from .retrievers.qdrant_retriever import QdrantRetriever
+from .retrievers.sqlite_vec_retriever import SqliteVecRetriever
+from .model.document_models import DocumentChunk
 from .model.search_models import SearchResult
+from .query_cache import SemanticQueryCache
 from .config import load_config, get_default_config
 from .exceptions import (
     RAGSystemError, DocumentProcessingError, QueryError, 
@@ -23,6 +36,52 @@ from .exceptions import (
 logger = logging.getLogger(__name__)
 
 
+def parse_and_chunk(pdf_path: str, config: Dict[str, Any]) -> Tuple[List[DocumentChunk], Dict[str, Any]]:
+    """
+    解析并分片单个PDF文档（模块级函数，可在子进程中执行）
+    
+    Args:
+        pdf_path: PDF文件路径
+        config: 系统配置字典
+        
+    Returns:
+        (文档分片列表, 文档元数据)
+    """
+    parser_config = config['parser']
+    # 进程池工作进程是守护进程，不能再创建子进程，因此这里不设置page_workers
+    parser = SimplePDFParser(
+        output_dir=parser_config['output_dir'],
+        filter_patterns=parser_config.get('filter_patterns'),
+        preload=parser_config.get('preload', False)
+    )
+    
+    chunker_config = config['chunker']
+    chunker = SimpleOverlapChunker(
+        chunk_size=chunker_config['chunk_size'],
+        overlap_size=chunker_config['overlap_size']
+    )
+    
+    parsed_doc = parser.parse(pdf_path)
+    return chunker.chunk(parsed_doc), parsed_doc.metadata
+
+
+def _group_duplicate_chunks(chunks: List[DocumentChunk]) -> List[List[int]]:
+    """
+    按内容哈希对分片分组，每组为内容相同的分片下标，组按首次出现的顺序排列
+    
+    Args:
+        chunks: 文档分片列表
+        
+    Returns:
+        List[List[int]]: 分片下标分组
+    """
+    groups: Dict[bytes, List[int]] = {}
+    for i, chunk in enumerate(chunks):
+        digest = hashlib.blake2b(chunk.content.encode('utf-8'), digest_size=16).digest()
+        groups.setdefault(digest, []).append(i)
+    return list(groups.values())
+
+
 class RAGSystem:
     """
     RAG系统主控制器
@@ -62,14 +121,24 @@ class RAGSystem:
             parser_config = self.config['parser']
             self.parser = SimplePDFParser(
                 output_dir=parser_config['output_dir'],
-                filter_patterns=parser_config.get('filter_patterns')
+                filter_patterns=parser_config.get('filter_patterns'),
+                preload=parser_config.get('preload', False),
+                page_workers=parser_config.get('page_workers', 1)
             )
             
             # 初始化向量化器
             embedder_config = self.config['embedder']
+            cache_path = embedder_config.get('cache_path')
             self.embedder = BGEEmbedder(
                 model_name=embedder_config['model_name'],
-                device=embedder_config.get('device')
+                device=embedder_config.get('device'),
+                batch_size=embedder_config.get('batch_size', 64),
+                precision=embedder_config.get('precision', 'auto'),
+                backend=embedder_config.get('backend', 'torch'),
+                quantize=embedder_config.get('quantize', False),
+                token_budget=embedder_config.get('token_budget'),
+                max_seq_length=embedder_config.get('max_seq_length'),
+                cache=EmbeddingCache(cache_path) if cache_path else None
             )
             
             # 初始化分片器
@@ -81,10 +150,40 @@ class RAGSystem:
             
             # 初始化检索器
             retriever_config = self.config['retriever']
-            self.retriever = QdrantRetriever(
-                collection_name=retriever_config['collection_name'],
-                vector_size=retriever_config['vector_size']
-            )
+            if retriever_config.get('backend', 'qdrant') == 'sqlite_vec':
+                self.retriever = SqliteVecRetriever(
+                    collection_name=retriever_config['collection_name'],
+                    vector_size=retriever_config['vector_size'],
+                    db_path=retriever_config.get('sqlite_path', ':memory:'),
+                    upsert_batch_size=retriever_config.get('upsert_batch_size', 256),
+                    quantization=retriever_config.get('quantization')
+                )
+            else:
+                self.retriever = QdrantRetriever(
+                    collection_name=retriever_config['collection_name'],
+                    vector_size=retriever_config['vector_size'],
+                    url=retriever_config.get('url'),
+                    prefer_grpc=retriever_config.get('prefer_grpc', True),
+                    grpc_port=retriever_config.get('grpc_port', 6334),
+                    pool_size=retriever_config.get('pool_size', 32),
+                    datatype=retriever_config.get('datatype', 'float16'),
+                    distance_metric=Distance(retriever_config.get('distance_metric', 'cosine').capitalize()),
+                    assume_normalized=retriever_config.get('assume_normalized', False),
+                    hnsw_m=retriever_config.get('hnsw_m', 32),
+                    hnsw_ef_construct=retriever_config.get('hnsw_ef_construct', 256),
+                    hnsw_ef=retriever_config.get('hnsw_ef', 128),
+                    full_scan_threshold=retriever_config.get('full_scan_threshold', 10000),
+                    payload_indexes=retriever_config.get('payload_indexes'),
+                    upsert_batch_size=retriever_config.get('upsert_batch_size', 256),
+                    upsert_parallel=retriever_config.get('upsert_parallel', 1),
+                    quantization=retriever_config.get('quantization'),
+                    rescore=retriever_config.get('rescore', True),
+                    oversampling=retriever_config.get('oversampling'),
+                    uint8_range=retriever_config.get('uint8_range', 0.3)
+                )
+            
+            self._query_max_length = embedder_config.get('query_max_length', 64)
+            self._init_query_caches()
             
             logger.info("所有组件初始化完成")
             
@@ -92,6 +191,23 @@ class RAGSystem:
             logger.error(f"组件初始化失败: {e}")
             raise ConfigurationError(f"RAG系统组件初始化失败: {e}") from e
     
+    def _init_query_caches(self) -> None:
+        """按query配置（重新）创建查询向量LRU缓存和语义查询缓存，原有缓存条目全部丢弃"""
+        query_config = self.config['query']
+        
+        # 查询向量LRU缓存：问题文本 -> 向量，更换向量化器时随之重建
+        self._query_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_embedding_cache_size = query_config.get('embedding_cache_size', 1024)
+        
+        # 语义查询缓存（cache_size为0时禁用）
+        self.query_cache = None
+        if query_config.get('cache_size', 0) > 0:
+            self.query_cache = SemanticQueryCache(
+                capacity=query_config['cache_size'],
+                threshold=query_config.get('cache_threshold', 0.95),
+                ttl=query_config.get('cache_ttl', 300)
+            )
+    
     def process_document(self, pdf_path: str) -> Dict[str, Any]:
         """
         处理文档的完整流程：解析 -> 分片 -> 向量化 -> 存储
@@ -124,55 +240,126 @@ class RAGSystem:
             chunks = self.chunker.chunk(parsed_doc)
             logger.info(f"文档分片完成，共生成 {len(chunks)} 个分片")
             
-            if not chunks:
-                raise DocumentProcessingError("文档分片后没有生成任何内容块")
-            
-            # 4. 向量化
-            logger.info(f"正在向量化 {len(chunks)} 个分片...")
-            texts = [chunk.content for chunk in chunks]
-            
-            # 批量向量化
-            embeddings = self.embedder.embed(texts)
-            
-            # 为每个chunk添加embedding
-            for chunk, embedding in zip(chunks, embeddings):
-                chunk.embedding = embedding
+            return self._index_chunks(pdf_path, chunks, parsed_doc.metadata, start_time)
             
-            logger.info("向量化完成")
-            
-            # 5. 存储到向量数据库
-            logger.info("正在存储到向量数据库...")
-            self.retriever.add_documents(chunks)
-            logger.info("存储完成")
+        except Exception as e:
+            logger.error(f"文档处理失败: {e}")
+            if isinstance(e, (RAGFileNotFoundError, DocumentProcessingError)):
+                raise
+            else:
+                raise DocumentProcessingError(f"处理文档 {pdf_path} 时发生错误: {e}") from e
+    
+    def process_documents(self, pdf_paths: List[str], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        批量处理多个文档：多进程并行解析和分片，主进程统一向量化和存储
+        
+        Args:
+            pdf_paths: PDF文件路径列表
+            workers: 并行解析的进程数，None时使用CPU核数-1
             
-            # 6. 更新系统状态
-            self.is_document_processed = True
-            self.document_count += 1
-            self.chunk_count += len(chunks)
-            self.last_processed_document = pdf_path
+        Returns:
+            每个文档的处理结果统计信息
             
-            # 7. 计算处理时间
-            processing_time = time.time() - start_time
+        Raises:
+            DocumentProcessingError: 文档处理失败时
+        """
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        workers = min(workers, len(pdf_paths))
+        
+        # 单个文档或单进程时无需启动进程池
+        if workers <= 1:
+            return [self.process_document(pdf_path) for pdf_path in pdf_paths]
+        
+        for pdf_path in pdf_paths:
+            if not Path(pdf_path).exists():
+                raise RAGFileNotFoundError(f"PDF文件不存在: {pdf_path}")
+        
+        start_time = time.time()
+        logger.info(f"使用 {workers} 个进程并行解析 {len(pdf_paths)} 个PDF文档...")
+        
+        try:
+            # PDF解析和分片是CPU密集型且文档间相互独立，交给进程池；
+            # 向量化模型和向量数据库是共享资源，保留在主进程
+            with multiprocessing.Pool(workers) as pool:
+                parsed = pool.map(partial(parse_and_chunk, config=self.config), pdf_paths)
             
-            # 8. 返回统计信息
-            result = {
-                "success": True,
-                "document_path": pdf_path,
-                "chunks_created": len(chunks),
-                "total_characters": sum(len(chunk.content) for chunk in chunks),
-                "processing_time": f"{processing_time:.2f}秒",
-                "pages_processed": parsed_doc.metadata.get('page_count', 0)
-            }
+            logger.info(f"并行解析完成，耗时 {time.time() - start_time:.2f}秒")
             
-            logger.info(f"文档处理完成: {result}")
-            return result
+            return [
+                self._index_chunks(pdf_path, chunks, metadata, start_time)
+                for pdf_path, (chunks, metadata) in zip(pdf_paths, parsed)
+            ]
             
         except Exception as e:
-            logger.error(f"文档处理失败: {e}")
-            if isinstance(e, (RAGFileNotFoundError, DocumentProcessingError)):
+            logger.error(f"批量文档处理失败: {e}")
+            if isinstance(e, DocumentProcessingError):
                 raise
             else:
-                raise DocumentProcessingError(f"处理文档 {pdf_path} 时发生错误: {e}") from e
+                raise DocumentProcessingError(f"批量处理文档时发生错误: {e}") from e
+    
+    def _index_chunks(self, pdf_path: str, chunks: List[DocumentChunk],
+                      metadata: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+        """
+        向量化文档分片并存储到向量数据库，更新系统状态
+        
+        Args:
+            pdf_path: PDF文件路径
+            chunks: 文档分片列表
+            metadata: 文档元数据
+            start_time: 处理开始时间，用于统计耗时
+            
+        Returns:
+            处理结果统计信息
+        """
+        if not chunks:
+            raise DocumentProcessingError("文档分片后没有生成任何内容块")
+        
+        # 4-5. 内容相同的分片只向量化一次，分段向量化并立即写入向量数据库，
+        # 峰值内存只与分段大小有关。每段包含index_batches个向量化批次，
+        # encode在段内按长度排序后再切分批次，批内填充token较少
+        groups = _group_duplicate_chunks(chunks)
+        embedder_config = self.config['embedder']
+        slice_size = embedder_config.get('batch_size', 64) * embedder_config.get('index_batches', 16)
+        logger.info(f"正在向量化并存储 {len(chunks)} 个分片"
+                    f"（去重后 {len(groups)} 个，每段 {slice_size} 个）...")
+        
+        for start in range(0, len(groups), slice_size):
+            batch_groups = groups[start:start + slice_size]
+            embeddings = self.embedder.embed([chunks[group[0]].content for group in batch_groups])
+            # 重复分片复用同一向量，各自保留自己的元数据
+            batch = [chunks[i] for group in batch_groups for i in group]
+            counts = [len(group) for group in batch_groups]
+            self.retriever.add_documents(batch, np.repeat(embeddings, counts, axis=0))
+        
+        logger.info("向量化与存储完成")
+        
+        # 文档库已变化，缓存的查询结果失效
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        
+        # 6. 更新系统状态
+        self.is_document_processed = True
+        self.document_count += 1
+        self.chunk_count += len(chunks)
+        self.last_processed_document = pdf_path
+        
+        # 7. 计算处理时间
+        processing_time = time.time() - start_time
+        
+        # 8. 返回统计信息
+        result = {
+            "success": True,
+            "document_path": pdf_path,
+            "chunks_created": len(chunks),
+            "unique_chunks": len(groups),
+            "total_characters": sum(len(chunk.content) for chunk in chunks),
+            "processing_time": f"{processing_time:.2f}秒",
+            "pages_processed": metadata.get('page_count', 0)
+        }
+        
+        logger.info(f"文档处理完成: {result}")
+        return result
     
     def query(self, question: str, top_k: Optional[int] = None) -> List[SearchResult]:
         """
@@ -203,20 +390,30 @@ class RAGSystem:
             if top_k <= 0:
                 raise QueryError("返回结果数量必须大于0")
             
-            logger.info(f"开始查询: {question[:50]}{'...' if len(question) > 50 else ''}")
+            logger.info("开始查询: %.50s%s", question, '...' if len(question) > 50 else '')
             
             # 3. 问题向量化
             logger.debug("正在向量化查询问题...")
-            query_embedding = self.embedder.embed([question])[0]
+            query_embedding = self._embed_query(question)
+            
+            # 语义缓存：相近问题直接返回缓存结果
+            if self.query_cache is not None:
+                cached_results = self.query_cache.get(query_embedding, top_k)
+                if cached_results is not None:
+                    logger.info("命中语义查询缓存，返回 %d 个结果", len(cached_results))
+                    return cached_results
             
             # 4. 向量检索
-            logger.debug(f"正在检索相关文档片段 (top_k={top_k})...")
+            logger.debug("正在检索相关文档片段 (top_k=%d)...", top_k)
             results = self.retriever.search(query_embedding, top_k)
             
             # 5. 结果后处理
             filtered_results = self._post_process_results(results, question)
             
-            logger.info(f"查询完成，返回 {len(filtered_results)} 个结果")
+            if self.query_cache is not None:
+                self.query_cache.put(query_embedding, top_k, filtered_results)
+            
+            logger.info("查询完成，返回 %d 个结果", len(filtered_results))
             
             return filtered_results
             
@@ -227,6 +424,34 @@ class RAGSystem:
             else:
                 raise QueryError(f"查询过程中发生错误: {e}") from e
     
+    def _embed_query(self, question: str) -> np.ndarray:
+        """
+        向量化查询问题，重复出现的问题直接使用LRU缓存中的向量
+        
+        Args:
+            question: 查询问题
+            
+        Returns:
+            查询向量
+        """
+        if self._query_embedding_cache_size <= 0:
+            return self.embedder.embed_query(question, self._query_max_length)
+        
+        # 归一化后作为缓存键：去除首尾空白、全半角统一、忽略大小写
+        key = unicodedata.normalize('NFKC', question.strip()).lower()
+        
+        embedding = self._query_embedding_cache.get(key)
+        if embedding is not None:
+            self._query_embedding_cache.move_to_end(key)
+            logger.debug("命中查询向量缓存")
+            return embedding
+        
+        embedding = self.embedder.embed_query(question, self._query_max_length)
+        self._query_embedding_cache[key] = embedding
+        if len(self._query_embedding_cache) > self._query_embedding_cache_size:
+            self._query_embedding_cache.popitem(last=False)
+        return embedding
+    
     def _post_process_results(self, results: List[SearchResult], question: str) -> List[SearchResult]:
         """
         结果后处理：相似度过滤、内容截断等
@@ -246,7 +471,7 @@ class RAGSystem:
         filtered_results = [r for r in results if r.score >= min_score]
         
         if len(filtered_results) < len(results):
-            logger.debug(f"相似度过滤: {len(results)} -> {len(filtered_results)} 个结果")
+            logger.debug("相似度过滤: %d -> %d 个结果", len(results), len(filtered_results))
         
         # 2. 内容长度限制
         max_length = self.config['query']['max_content_length']
@@ -301,6 +526,9 @@ class RAGSystem:
             logger.info("正在清空向量数据库...")
             self.retriever.clear_collection()
             
+            if self.query_cache is not None:
+                self.query_cache.clear()
+            
             # 重置状态
             self.is_document_processed = False
             self.document_count = 0
@@ -354,6 +582,9 @@ class RAGSystem:
                     self.chunk_count = 0
                     self.last_processed_document = None
                     logger.warning("检索器配置已变化，请重新处理文档")
+            elif 'query' in new_config:
+                # 缓存容量、阈值等可能变化，按新配置重建查询缓存
+                self._init_query_caches()
             
             logger.info("配置更新完成")
             
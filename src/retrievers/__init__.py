@@ -3,24 +3,32 @@
 提供向量存储和检索的接口定义
 """
 
-from typing import Protocol, List, Dict, Any
+from typing import Protocol, List, Dict, Any, Optional
+
+import numpy as np
+
 from ..model import DocumentChunk, SearchResult
-from .qdrant_retriever import QdrantRetriever, default_retriever, create_retriever
+from ._vectors import Vector
+from .qdrant_retriever import QdrantRetriever, get_default_retriever, create_retriever
+from .async_qdrant_retriever import AsyncQdrantRetriever
+from .sqlite_vec_retriever import SqliteVecRetriever
 
 
 class VectorStore(Protocol):
     """向量存储协议接口"""
     
-    def add_documents(self, chunks: List[DocumentChunk]) -> None:
+    def add_documents(self, chunks: List[DocumentChunk],
+                      embeddings: Optional[np.ndarray] = None) -> None:
         """
         批量添加文档块到向量存储
         
         Args:
             chunks: 文档分片列表
+            embeddings: 与chunks逐行对应的向量矩阵，None时使用各分片的embedding字段
         """
         ...
     
-    def search(self, query_embedding: List[float], top_k: int) -> List[SearchResult]:
+    def search(self, query_embedding: Vector, top_k: int) -> List[SearchResult]:
         """
         相似度检索
         
@@ -33,10 +41,20 @@ class VectorStore(Protocol):
         """
         ...
 
+
+def __getattr__(name: str):
+    if name == 'default_retriever':
+        return get_default_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # 导出公共接口
 __all__ = [
     'VectorStore',           # 向量存储协议
     'QdrantRetriever',       # Qdrant向量检索器实现
-    'default_retriever',     # 默认检索器实例
+    'AsyncQdrantRetriever',  # 异步Qdrant向量检索器实现
+    'SqliteVecRetriever',    # sqlite-vec进程内向量检索器实现
+    'default_retriever',     # 默认检索器实例（首次访问时创建）
+    'get_default_retriever', # 获取默认检索器实例
     'create_retriever',      # 便捷创建函数
 ]
@@ -0,0 +1,26 @@
+"""
+检索器共用的分片ID生成
+"""
+
+from typing import Any, Dict
+import hashlib
+import json
+
+
+def point_id(content: str, metadata: Dict[str, Any]) -> int:
+    """
+    由分片内容和元数据生成确定性的64位无符号整数ID
+    
+    整数ID在Qdrant中按64位整数存储，比UUID字符串更省内存、查找更快；
+    同一分片重复写入时覆盖原有的点，而不是产生重复数据。元数据按键排序序列化，
+    与键的插入顺序无关。
+    
+    固定使用标准库json：orjson的浮点数格式不同（1e+20 与 1e20），且接受NumPy标量和
+    datetime，ID会随是否安装orjson而变化
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(content.encode("utf-8"))
+    digest.update(b"\0")
+    canonical = json.dumps(metadata, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest.update(canonical.encode("utf-8"))
+    return int.from_bytes(digest.digest(), "big")
@@ -0,0 +1,46 @@
+"""
+向量矩阵数值校验
+优先使用Numba JIT内核，未安装Numba时回退到NumPy实现
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于运行环境
+    NUMBA_AVAILABLE = False
+
+
+def _first_non_finite_numpy(vectors: np.ndarray) -> int:
+    """NumPy实现：整体判断后取第一个含非有限值的行"""
+    bad_rows = np.flatnonzero(~np.isfinite(vectors).all(axis=1))
+    return int(bad_rows[0]) if bad_rows.size else -1
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _first_non_finite_jit(vectors):
+        rows, cols = vectors.shape
+        for i in range(rows):
+            for j in range(cols):
+                if not np.isfinite(vectors[i, j]):
+                    return i
+        return -1
+
+
+def first_non_finite_row(vectors: np.ndarray) -> int:
+    """
+    查找第一个包含NaN或无穷值的行
+    
+    Args:
+        vectors: 二维浮点向量矩阵
+    
+    Returns:
+        int: 行下标，全部为有限值时返回-1
+    """
+    # Numba不支持float16，半精度矩阵走NumPy实现
+    if NUMBA_AVAILABLE and vectors.dtype != np.float16:
+        return int(_first_non_finite_jit(np.ascontiguousarray(vectors)))
+    return _first_non_finite_numpy(vectors)
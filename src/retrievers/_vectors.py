@@ -0,0 +1,81 @@
+"""
+检索器共用的向量整理工具
+"""
+
+from typing import List, Optional, Union
+
+import numpy as np
+
+from ..model import DocumentChunk
+from ._validate import first_non_finite_row
+
+
+# 查询向量：向量化器输出的NumPy数组可直接传入，无需先转换为Python列表
+Vector = Union[List[float], np.ndarray]
+
+
+def stack_embeddings(chunks: List[DocumentChunk], embeddings: Optional[np.ndarray],
+                     vector_size: int) -> np.ndarray:
+    """
+    整理并校验待写入的向量矩阵
+    
+    Args:
+        chunks: 文档分片列表
+        embeddings: 与chunks逐行对应的向量矩阵，None时取各分片的embedding字段
+        vector_size: 集合向量维度
+    
+    Returns:
+        np.ndarray: 形状为 (len(chunks), vector_size) 的float32矩阵
+    
+    Raises:
+        ValueError: 当向量缺失、维度不匹配或包含NaN/无穷值时
+    """
+    vectors = _to_matrix(chunks, embeddings, vector_size)
+    
+    # 维度由矩阵形状一次确认，数值只需在JIT内核中扫描一遍
+    bad_row = first_non_finite_row(vectors)
+    if bad_row != -1:
+        raise ValueError(f"Chunk {bad_row} embedding contains NaN or infinite values")
+    
+    return vectors
+
+
+def _to_matrix(chunks: List[DocumentChunk], embeddings: Optional[np.ndarray],
+               vector_size: int) -> np.ndarray:
+    """将向量整理为 (len(chunks), vector_size) 的float32矩阵并校验形状"""
+    if embeddings is None:
+        # 一次转换整个矩阵，形状正确即说明所有分片的向量都存在且维度一致；
+        # 只有出错时才逐个检查分片，定位并报告具体的问题分片
+        try:
+            vectors = np.asarray([chunk.embedding for chunk in chunks], dtype=np.float32)
+        except (TypeError, ValueError):
+            vectors = None
+        
+        if vectors is not None and vectors.shape == (len(chunks), vector_size):
+            return vectors
+        
+        for i, chunk in enumerate(chunks):
+            if chunk.embedding is None or len(chunk.embedding) == 0:
+                raise ValueError(f"Chunk {i} is missing embedding vector")
+            
+            if len(chunk.embedding) != vector_size:
+                raise ValueError(
+                    f"Chunk {i} embedding dimension ({len(chunk.embedding)}) "
+                    f"does not match collection dimension ({vector_size})"
+                )
+        
+        raise ValueError("Chunk embeddings could not be converted to a float matrix")
+    
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if vectors.ndim != 2 or vectors.shape[0] != len(chunks):
+        raise ValueError(
+            f"Embeddings shape {vectors.shape} does not match {len(chunks)} chunks"
+        )
+    
+    if vectors.shape[1] != vector_size:
+        raise ValueError(
+            f"Embedding dimension ({vectors.shape[1]}) "
+            f"does not match collection dimension ({vector_size})"
+        )
+    
+    return vectors
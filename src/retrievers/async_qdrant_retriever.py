@@ -0,0 +1,364 @@
+"""
+异步Qdrant向量检索器实现
+基于AsyncQdrantClient，并发检索/写入时请求之间不互相阻塞
+"""
+
+from typing import List, Dict, Any, AsyncIterator, Optional, Union
+import asyncio
+import logging
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Batch, Filter, FilterSelector
+import numpy as np
+
+from ..model import DocumentChunk, SearchResult
+from ._vectors import Vector
+from ._ids import point_id
+from .qdrant_retriever import _QdrantRetrieverBase, _RESULT_PAYLOAD
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncQdrantRetriever(_QdrantRetrieverBase):
+    """
+    异步Qdrant向量检索器
+    
+    参数、向量整理、量化和结果转换与QdrantRetriever共用，读写方法均为协程。
+    集合在首次读写时创建。多个查询可以并发执行：
+        
+        results = await asyncio.gather(*[retriever.search(q, 3) for q in queries])
+    """
+    
+    def __init__(self, *args, pool_size: int = 100, **kwargs):
+        """
+        初始化异步Qdrant检索器，参数同QdrantRetriever
+        
+        Args:
+            pool_size: 客户端连接池大小，默认100以支持大量并发请求
+        """
+        self._collection_ready = False
+        self._setup_lock = asyncio.Lock()
+        super().__init__(*args, pool_size=pool_size, **kwargs)
+    
+    @staticmethod
+    def _create_client(url: Optional[str], prefer_grpc: bool, grpc_port: int,
+                       pool_size: int) -> AsyncQdrantClient:
+        """按服务地址创建异步客户端"""
+        if url is None:
+            logger.info("Using async Qdrant in-memory mode")
+            return AsyncQdrantClient(":memory:")
+        
+        logger.info("Using async Qdrant server at %s (prefer_grpc=%s)", url, prefer_grpc)
+        return AsyncQdrantClient(
+            url=url,
+            prefer_grpc=prefer_grpc,
+            grpc_port=grpc_port,
+            pool_size=pool_size
+        )
+    
+    def _setup_collection(self) -> None:
+        """构造时不访问服务，集合在首次读写时由 _ensure_collection 创建并校验"""
+        self._collection_ready = False
+    
+    async def _ensure_collection(self) -> None:
+        """
+        创建或校验向量集合（只执行一次）
+        
+        Raises:
+            ValueError: 当已有集合的向量维度与检索器不一致时
+            RuntimeError: 当访问集合失败时
+        """
+        if self._collection_ready:
+            return
+        
+        async with self._setup_lock:
+            if self._collection_ready:
+                return
+            
+            actual_size = self.vector_size
+            try:
+                if not await self.client.collection_exists(self.collection_name):
+                    logger.info("Creating collection: %s", self.collection_name)
+                    await self.client.create_collection(
+                        collection_name=self.collection_name,
+                        **self._collection_config()
+                    )
+                    for field_name, schema in self.payload_indexes:
+                        await self.client.create_payload_index(
+                            collection_name=self.collection_name,
+                            field_name=field_name,
+                            field_schema=schema
+                        )
+                else:
+                    collection_info = await self.client.get_collection(self.collection_name)
+                    actual_size = collection_info.config.params.vectors.size
+            except Exception as e:
+                logger.error("Failed to setup collection: %s", e)
+                raise RuntimeError(f"Collection setup failed: {e}") from e
+            
+            # 与同步检索器一致：维度不符时拒绝读写，下次调用重新校验
+            if actual_size != self.vector_size:
+                raise ValueError(
+                    f"Collection vector size ({actual_size}) "
+                    f"does not match expected ({self.vector_size})"
+                )
+            self._collection_ready = True
+    
+    async def add_documents(self, chunks: List[DocumentChunk],
+                            embeddings: Optional[np.ndarray] = None) -> None:
+        """
+        批量添加文档块到向量存储，各批次并发写入（并发数为upsert_parallel）
+        
+        Args:
+            chunks: 文档分片列表
+            embeddings: 与chunks逐行对应的向量矩阵，None时使用各分片的embedding字段
+        
+        Raises:
+            ValueError: 当分片缺少embedding时
+            RuntimeError: 当存储操作失败时
+        """
+        if not chunks:
+            logger.warning("No chunks provided for indexing")
+            return
+        
+        await self._ensure_collection()
+        logger.info("Adding %d document chunks to collection", len(chunks))
+        
+        points = self._build_points(chunks, embeddings)
+        semaphore = asyncio.Semaphore(self.upsert_parallel)
+        
+        async def upsert(batch):
+            async with semaphore:
+                return await self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=batch,
+                    wait=True
+                )
+        
+        try:
+            statuses = await asyncio.gather(*[upsert(batch) for batch in self._split_batches(points)])
+            operation_info = next(
+                (info for info in statuses if info.status != "completed"), statuses[-1]
+            )
+            self._log_upsert_status(operation_info, len(points))
+            self._invalidate_cache()
+        
+        except Exception as e:
+            logger.error("Failed to add documents: %s", e)
+            raise RuntimeError(f"Document indexing failed: {e}") from e
+    
+    async def add_documents_fused(self, contents: List[str], metadatas: List[Dict[str, Any]],
+                                  embeddings: np.ndarray) -> None:
+        """
+        直接由内容、元数据和向量矩阵写入，各批次以列式Batch并发提交
+        
+        Args:
+            contents: 文档内容列表
+            metadatas: 与contents逐一对应的元数据列表
+            embeddings: 形状为 (len(contents), vector_size) 的向量矩阵
+        
+        Raises:
+            ValueError: 当数量或维度不匹配、或向量包含NaN/无穷值时
+            RuntimeError: 当存储操作失败时
+        """
+        if not contents:
+            logger.warning("No chunks provided for indexing")
+            return
+        
+        if len(metadatas) != len(contents):
+            raise ValueError(
+                f"Got {len(metadatas)} metadata entries for {len(contents)} contents"
+            )
+        
+        vectors = self._storage_matrix(embeddings, len(contents))
+        metadatas = [dict(metadata) for metadata in metadatas]
+        await self._ensure_collection()
+        logger.info("Adding %d document chunks to collection", len(contents))
+        
+        semaphore = asyncio.Semaphore(self.upsert_parallel)
+        
+        async def upsert(start):
+            stop = start + self.upsert_batch_size
+            batch = Batch(
+                ids=[point_id(c, m) for c, m in zip(contents[start:stop], metadatas[start:stop])],
+                vectors=vectors[start:stop].tolist(),
+                payloads=[
+                    {"content": c, "metadata": m}
+                    for c, m in zip(contents[start:stop], metadatas[start:stop])
+                ]
+            )
+            async with semaphore:
+                return await self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=batch,
+                    wait=True
+                )
+        
+        try:
+            statuses = await asyncio.gather(
+                *[upsert(start) for start in range(0, len(contents), self.upsert_batch_size)]
+            )
+            operation_info = next(
+                (info for info in statuses if info.status != "completed"), statuses[-1]
+            )
+            self._log_upsert_status(operation_info, len(contents))
+            self._invalidate_cache()
+        
+        except Exception as e:
+            logger.error("Failed to add documents: %s", e)
+            raise RuntimeError(f"Document indexing failed: {e}") from e
+    
+    async def search(self, query_embedding: Vector, top_k: int = 3) -> List[SearchResult]:
+        """
+        相似度检索
+        
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回结果数量，默认3
+        
+        Returns:
+            List[SearchResult]: 按相似度降序排列的检索结果
+        """
+        self._check_query(query_embedding, top_k)
+        
+        if self.cache is not None:
+            cached_results = self.cache.get(query_embedding, top_k)
+            if cached_results is not None:
+                return cached_results
+        
+        await self._ensure_collection()
+        
+        try:
+            search_results = (await self.client.query_points(
+                collection_name=self.collection_name,
+                query=self._query_vector(query_embedding),
+                limit=top_k,
+                search_params=self._search_params,
+                with_payload=_RESULT_PAYLOAD,
+                with_vectors=False,
+            )).points
+            results = self._to_results(search_results)
+        
+        except Exception as e:
+            logger.error("Search failed: %s", e)
+            raise RuntimeError(f"Search operation failed: {e}") from e
+        
+        if self.cache is not None:
+            self.cache.put(query_embedding, top_k, results)
+        return results
+    
+    async def isearch(self, query_embedding: Vector, top_k: int = 3) -> AsyncIterator[SearchResult]:
+        """相似度检索的异步生成器版本，逐条产出SearchResult，不经过语义缓存"""
+        self._check_query(query_embedding, top_k)
+        await self._ensure_collection()
+        
+        try:
+            search_results = (await self.client.query_points(
+                collection_name=self.collection_name,
+                query=self._query_vector(query_embedding),
+                limit=top_k,
+                search_params=self._search_params,
+                with_payload=_RESULT_PAYLOAD,
+                with_vectors=False,
+            )).points
+        except Exception as e:
+            logger.error("Search failed: %s", e)
+            raise RuntimeError(f"Search operation failed: {e}") from e
+        
+        for result in self._iter_results(search_results):
+            yield result
+    
+    async def search_many(self, query_embeddings: List[Vector],
+                          top_k: int = 3) -> List[List[SearchResult]]:
+        """批量相似度检索，所有查询在一次请求中提交"""
+        if len(query_embeddings) == 0:
+            return []
+        
+        for query_embedding in query_embeddings:
+            self._check_query(query_embedding, top_k)
+        await self._ensure_collection()
+        
+        try:
+            batch_results = await self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=self._query_requests(query_embeddings, top_k)
+            )
+            return [self._to_results(response.points) for response in batch_results]
+        
+        except Exception as e:
+            logger.error("Batch search failed: %s", e)
+            raise RuntimeError(f"Batch search operation failed: {e}") from e
+    
+    async def search_with_filter(self,
+                                 query_embedding: Vector,
+                                 top_k: int = 3,
+                                 metadata_filter: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
+        """带过滤条件的相似度检索"""
+        self._check_query(query_embedding, top_k)
+        await self._ensure_collection()
+        
+        try:
+            search_results = (await self.client.query_points(
+                collection_name=self.collection_name,
+                query=self._query_vector(query_embedding),
+                query_filter=self._build_filter(metadata_filter),
+                limit=top_k,
+                search_params=self._search_params,
+                with_payload=_RESULT_PAYLOAD,
+                with_vectors=False,
+            )).points
+            return self._to_results(search_results)
+        
+        except Exception as e:
+            logger.error("Filtered search failed: %s", e)
+            raise RuntimeError(f"Filtered search operation failed: {e}") from e
+    
+    async def get_collection_info(self) -> Dict[str, Any]:
+        """获取集合信息"""
+        try:
+            await self._ensure_collection()
+            return self._format_collection_info(await self.client.get_collection(self.collection_name))
+        except Exception as e:
+            logger.error("Failed to get collection info: %s", e)
+            return {"error": str(e)}
+    
+    async def clear_collection(self) -> None:
+        """清空集合中的所有数据，集合已校验时只删除全部点，否则删除并重建集合"""
+        try:
+            if self._collection_ready:
+                await self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=FilterSelector(filter=Filter()),
+                    wait=True
+                )
+                logger.info("Collection '%s' cleared", self.collection_name)
+            else:
+                await self.client.delete_collection(self.collection_name)
+                await self._ensure_collection()
+                logger.info("Collection '%s' cleared and recreated", self.collection_name)
+            self._invalidate_cache()
+        except Exception as e:
+            logger.error("Failed to clear collection: %s", e)
+            raise RuntimeError(f"Clear collection failed: {e}") from e
+    
+    async def delete_documents(self, ids: List[Union[int, str]]) -> None:
+        """删除指定ID的文档"""
+        if not ids:
+            return
+        
+        try:
+            await self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=ids,
+                wait=True
+            )
+            self._invalidate_cache()
+            logger.info("Deleted %d documents", len(ids))
+        except Exception as e:
+            logger.error("Failed to delete documents: %s", e)
+            raise RuntimeError(f"Delete operation failed: {e}") from e
+    
+    async def close(self) -> None:
+        """关闭客户端连接"""
+        await self.client.close()
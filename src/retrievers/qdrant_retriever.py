@@ -3,61 +3,170 @@ Qdrant向量检索器实现
 使用Qdrant向量数据库进行文档存储和检索
 """
 
-from typing import List, Dict, Any, Optional
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import logging
-from uuid import uuid4
+import threading
+import weakref
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import (
-    VectorParams, Distance, PointStruct, CollectionInfo,
-    OptimizersConfig, ScalarQuantization, ScalarQuantizationConfig, ScalarType
+    VectorParams, Distance, Datatype, PointStruct, CollectionInfo,
+    OptimizersConfig, ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, SearchParams, QuantizationSearchParams,
+    QueryRequest, HnswConfigDiff, PayloadSchemaType, Filter, FieldCondition, MatchValue,
+    FilterSelector
 )
 from qdrant_client.http.exceptions import ResponseHandlingException
+import numpy as np
 
 # QdrantRetriever implicitly implements the VectorStore protocol
 from ..model import DocumentChunk, SearchResult
+from ..query_cache import SemanticQueryCache
+from ._ids import point_id
+from ._validate import first_non_finite_row
+from ._vectors import Vector, stack_embeddings
 
 
 logger = logging.getLogger(__name__)
 
+# 远程服务的共享客户端：同一服务地址的检索器复用一个连接池
+_CLIENTS: Dict[Tuple[str, bool, int], QdrantClient] = {}
+_CLIENTS_LOCK = threading.Lock()
 
-class QdrantRetriever:
+# 已确认的集合向量维度（按客户端记录）：同一客户端上再次构造检索器时无需重新查询集合配置
+_COLLECTION_SIZES: "weakref.WeakKeyDictionary[Any, Dict[str, int]]" = weakref.WeakKeyDictionary()
+
+# 检索结果只需要的payload字段
+_RESULT_PAYLOAD = ["content", "metadata"]
+
+# 各量化方式默认的候选数量倍数：二值量化损失更大，需要更多候选参与重排
+_DEFAULT_OVERSAMPLING = {"int8": 2.0, "binary": 3.0}
+
+
+class _QdrantRetrieverBase(ABC):
     """
-    Qdrant向量检索器
-    实现基于Qdrant向量数据库的文档存储和检索功能
+    Qdrant检索器的共用部分
     
-    该实现提供高效的向量相似度搜索，适用于：
-    - RAG系统的文档检索
-    - 语义搜索
-    - 文档相似度匹配
+    构造参数、集合配置、向量整理、量化和结果转换在这里实现，
+    读写方法由同步的QdrantRetriever和异步的AsyncQdrantRetriever各自实现
     """
     
     def __init__(self, 
                  collection_name: str = "documents",
                  vector_size: int = 1024,
-                 client: Optional[QdrantClient] = None,
+                 client: Optional[Union[QdrantClient, AsyncQdrantClient]] = None,
+                 url: Optional[str] = None,
+                 prefer_grpc: bool = True,
+                 grpc_port: int = 6334,
+                 pool_size: int = 32,
                  distance_metric: Distance = Distance.COSINE,
-                 on_disk_storage: bool = False):
+                 assume_normalized: bool = False,
+                 on_disk_storage: bool = False,
+                 datatype: str = "float16",
+                 hnsw_m: int = 32,
+                 hnsw_ef_construct: int = 256,
+                 hnsw_ef: int = 128,
+                 full_scan_threshold: int = 10000,
+                 payload_indexes: Optional[List[Tuple[str, str]]] = None,
+                 upsert_batch_size: int = 256,
+                 upsert_parallel: int = 1,
+                 quantization: Optional[str] = None,
+                 rescore: bool = True,
+                 oversampling: Optional[float] = None,
+                 uint8_range: float = 0.3,
+                 cache: Optional[SemanticQueryCache] = None):
         """
         初始化Qdrant检索器
         
         Args:
             collection_name: 集合名称，默认为"documents"
             vector_size: 向量维度，默认1024（BGE-large）
-            client: Qdrant客户端，None时使用内存模式
+            client: Qdrant客户端（异步检索器为AsyncQdrantClient），None时按url创建
+            url: Qdrant服务地址，None时使用内存模式
+            prefer_grpc: 连接远程服务时优先使用gRPC传输
+            grpc_port: gRPC端口，默认6334
+            pool_size: 客户端连接池大小，并发写入/检索时避免排队等待连接
             distance_metric: 距离度量，默认余弦距离
+            assume_normalized: 声明写入和查询的向量均已L2归一化（BGE向量化器的输出即是），
+                               为True时余弦距离改用内积计算，排序和分数不变，省去逐次归一化；
+                               默认False，向量未归一化时开启会使排序出错
             on_disk_storage: 是否使用磁盘存储，内存模式时忽略
+            datatype: 原始向量的存储类型，"float16"（默认，存储和带宽减半，召回几乎无损）
+                      或"float32"；quantization="uint8"时固定为uint8
+            hnsw_m: HNSW图中每个节点的边数，默认32（Qdrant默认16偏向构建速度）
+            hnsw_ef_construct: 构建索引时的候选数量，默认256
+            hnsw_ef: 检索时的候选数量，越大召回越高、延迟越大，默认128
+            full_scan_threshold: 段内向量数据量（KB）低于该值时直接全量扫描，不走HNSW
+            payload_indexes: 创建集合时建立的payload索引，(字段路径, 类型) 列表，
+                             如 [("metadata.file_name", "keyword")]；过滤检索时与HNSW
+                             同时过滤，避免先检索后逐条过滤
+            upsert_batch_size: 单次upsert请求的点数量，默认256
+            upsert_parallel: 并发upsert请求数，大于1时各批次在线程池中并发提交，
+                             使网络传输与服务端索引重叠（适用于远程Qdrant服务）
+            quantization: 向量量化方式，None不量化，"int8"为标量量化，"binary"为二值量化
+                          （每维1比特，适合BGE-large等高维向量），量化向量均常驻内存
+            rescore: 量化检索后是否用原始向量对候选结果重新打分
+            oversampling: 量化检索的候选数量倍数，重排后截取top_k；
+                          None时int8为2.0、binary为3.0
+            uint8_range: quantization="uint8" 时的量化区间 [-uint8_range, uint8_range]，
+                         区间外的分量被截断
+            cache: 语义查询缓存，相近查询直接返回缓存结果、跳过Qdrant请求；
+                   集合内容变化时清空。None表示不缓存
         """
+        if quantization not in (None, "int8", "binary", "uint8"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        
+        if datatype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported datatype: {datatype}")
+        
         self.collection_name = collection_name
         self.vector_size = vector_size
         self.distance_metric = distance_metric
         self.on_disk_storage = on_disk_storage
+        self.datatype = datatype
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_ef = hnsw_ef
+        self.full_scan_threshold = full_scan_threshold
+        # 提前转换类型，配置错误在构造时即报错
+        self.payload_indexes = [
+            (field_name, PayloadSchemaType(schema)) for field_name, schema in payload_indexes or []
+        ]
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_parallel = upsert_parallel
+        self.quantization = quantization
+        self.rescore = rescore
+        self.oversampling = oversampling
+        self.uint8_range = uint8_range
+        self.cache = cache
+        
+        # 客户端uint8量化：所有维度共用一个仿射映射，欧氏距离只被等比缩放，
+        # 对单位向量而言排序与余弦相似度一致
+        if quantization == "uint8":
+            self.distance_metric = Distance.EUCLID
+        elif assume_normalized and distance_metric == Distance.COSINE:
+            # 单位向量的内积即余弦相似度
+            self.distance_metric = Distance.DOT
+        self._uint8_step = 2 * uint8_range / 255
+        
+        # 量化检索：先在量化向量上取 oversampling*top_k 个候选，再用原始向量重排
+        quantization_params = None
+        if quantization in _DEFAULT_OVERSAMPLING:
+            if oversampling is None:
+                oversampling = _DEFAULT_OVERSAMPLING[quantization]
+            quantization_params = QuantizationSearchParams(
+                ignore=False,
+                rescore=rescore,
+                oversampling=oversampling
+            )
+        self._search_params = SearchParams(hnsw_ef=hnsw_ef, quantization=quantization_params)
         
         # 初始化客户端
         if client is None:
-            # 强制使用内存模式，避免文件锁定问题
-            self.client = QdrantClient(":memory:")
-            logger.info("Using Qdrant in-memory mode")
+            self.client = self._create_client(url, prefer_grpc, grpc_port, pool_size)
         else:
             self.client = client
             logger.info("Using provided Qdrant client")
@@ -65,59 +174,301 @@ class QdrantRetriever:
         # 初始化集合
         self._setup_collection()
     
+    @staticmethod
+    @abstractmethod
+    def _create_client(url: Optional[str], prefer_grpc: bool, grpc_port: int, pool_size: int):
+        """按服务地址创建客户端，由子类实现"""
+    
+    @abstractmethod
+    def _setup_collection(self) -> None:
+        """构造时准备向量集合，由子类实现"""
+    
+    def _collection_config(self) -> Dict[str, Any]:
+        """创建集合所需的向量、优化器和量化配置"""
+        # 配置向量参数；服务端量化时检索只读常驻内存的量化向量，
+        # 原始向量只在重排时读取，放在磁盘上即可
+        if self.quantization == "uint8":
+            datatype = Datatype.UINT8
+        elif self.datatype == "float16":
+            datatype = Datatype.FLOAT16
+        else:
+            datatype = Datatype.FLOAT32
+        
+        vector_config = VectorParams(
+            size=self.vector_size,
+            distance=self.distance_metric,
+            on_disk=self.on_disk_storage or self.quantization in _DEFAULT_OVERSAMPLING,
+            datatype=datatype
+        )
+        
+        # int8标量量化：量化向量常驻内存用于检索，原始向量保留用于重排
+        quantization_config = None
+        if self.quantization == "int8":
+            quantization_config = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    # 按0.99分位数确定量化区间，避免离群值压缩有效精度
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        elif self.quantization == "binary":
+            # 二值量化：检索时用汉明距离粗筛，再用原始向量重排恢复召回
+            quantization_config = BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=True)
+            )
+        
+        return {
+            "vectors_config": vector_config,
+            # HNSW参数：边数和构建候选数越大，图连通性越好，检索时跳数和距离计算越少
+            "hnsw_config": HnswConfigDiff(
+                m=self.hnsw_m,
+                ef_construct=self.hnsw_ef_construct,
+                full_scan_threshold=self.full_scan_threshold
+            ),
+            # 使用默认优化器配置
+            "optimizers_config": None,
+            "quantization_config": quantization_config,
+        }
+    
+    def _storage_matrix(self, embeddings: np.ndarray, count: int) -> np.ndarray:
+        """校验向量矩阵形状和数值，并转换为集合的存储类型"""
+        vectors = np.asarray(embeddings)
+        if vectors.shape != (count, self.vector_size):
+            raise ValueError(
+                f"Embeddings shape {vectors.shape} does not match "
+                f"({count}, {self.vector_size})"
+            )
+        
+        # float16存储时在转换之后校验，超出float16范围的值也会被发现
+        dtype = np.float16 if self.datatype == "float16" and self.quantization != "uint8" else np.float32
+        vectors = vectors.astype(dtype, copy=False)
+        bad_row = first_non_finite_row(vectors)
+        if bad_row != -1:
+            raise ValueError(f"Chunk {bad_row} embedding contains NaN or infinite values")
+        
+        if self.quantization == "uint8":
+            return self._quantize_uint8(vectors)
+        return vectors
+    
+    def _build_points(self, chunks: List[DocumentChunk],
+                      embeddings: Optional[np.ndarray]) -> List[PointStruct]:
+        """校验向量并构造待写入的点"""
+        # 整个矩阵在存储边界一次性转换为Python列表
+        vectors = stack_embeddings(chunks, embeddings, self.vector_size)
+        if self.quantization == "uint8":
+            vectors = self._quantize_uint8(vectors)
+        vectors = vectors.tolist()
+        
+        # 维度已在整理矩阵时一次性校验，这里只做一次推导式构造。
+        # payload包含内容和元数据（ChainMap在存储边界展开为普通字典）
+        return [
+            PointStruct(
+                id=point_id(content, metadata),
+                vector=vector,
+                payload={"content": content, "metadata": metadata}
+            )
+            for content, metadata, vector in zip(
+                (chunk.content for chunk in chunks),
+                (dict(chunk.metadata) for chunk in chunks),
+                vectors
+            )
+        ]
+    
+    def _split_batches(self, points: List[PointStruct]) -> List[List[PointStruct]]:
+        """按upsert_batch_size切分写入批次"""
+        batch_size = self.upsert_batch_size
+        return [points[start:start + batch_size] for start in range(0, len(points), batch_size)]
+    
+    @staticmethod
+    def _log_upsert_status(operation_info, count: int) -> None:
+        if operation_info.status == "completed":
+            logger.info("Successfully added %d documents", count)
+        else:
+            logger.warning("Indexing operation status: %s", operation_info.status)
+    
+    def _query_requests(self, query_embeddings: List[Vector], top_k: int) -> List[QueryRequest]:
+        """为每个查询向量构造批量检索请求"""
+        return [
+            QueryRequest(
+                # 请求模型只接受列表
+                query=self._query_vector(query_embedding).tolist(),
+                limit=top_k,
+                params=self._search_params,
+                with_payload=_RESULT_PAYLOAD,
+                with_vector=False,
+            )
+            for query_embedding in query_embeddings
+        ]
+    
+    def _invalidate_cache(self) -> None:
+        """集合内容变化后清空语义查询缓存"""
+        if self.cache is not None:
+            self.cache.clear()
+    
+    def _check_query(self, query_embedding: Vector, top_k: int) -> None:
+        """校验查询向量和返回数量"""
+        if query_embedding is None or len(query_embedding) == 0:
+            raise ValueError("Query embedding cannot be empty")
+        
+        if len(query_embedding) != self.vector_size:
+            raise ValueError(
+                f"Query embedding dimension ({len(query_embedding)}) "
+                f"does not match collection dimension ({self.vector_size})"
+            )
+        
+        if top_k <= 0:
+            raise ValueError("top_k must be positive")
+    
+    @staticmethod
+    def _build_filter(metadata_filter: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """将元数据等值条件转换为Qdrant过滤条件，相同条件复用已构造的Filter"""
+        if not metadata_filter:
+            return None
+        
+        try:
+            return _compile_filter(tuple(sorted(metadata_filter.items())))
+        except TypeError:
+            # 条件值不可哈希时不缓存
+            return _compile_filter.__wrapped__(tuple(metadata_filter.items()))
+    
+    def _to_results(self, hits) -> List[SearchResult]:
+        """将Qdrant命中结果转换为SearchResult"""
+        return list(self._iter_results(hits))
+    
+    def _iter_results(self, hits) -> Iterator[SearchResult]:
+        """逐条将Qdrant命中结果转换为SearchResult"""
+        for hit in hits:
+            yield SearchResult(
+                content=hit.payload["content"],
+                metadata=hit.payload["metadata"],
+                score=self._hit_score(hit.score)
+            )
+    
+    def _quantize_uint8(self, vectors: np.ndarray) -> np.ndarray:
+        """将向量按 [-uint8_range, uint8_range] 区间线性量化为uint8"""
+        scaled = (vectors + self.uint8_range) / self._uint8_step
+        return np.rint(scaled).clip(0, 255).astype(np.uint8)
+    
+    def _query_vector(self, query_embedding: Vector) -> np.ndarray:
+        """按集合的存储方式转换查询向量，NumPy数组直接交给客户端序列化"""
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        if self.quantization == "uint8":
+            return self._quantize_uint8(vector)
+        return vector
+    
+    def _hit_score(self, score: float) -> float:
+        """
+        将Qdrant返回的分数转换为余弦相似度
+        
+        uint8集合返回量化空间中的欧氏距离d，还原到原始空间后，
+        单位向量的余弦相似度为 1 - (d*step)^2 / 2
+        """
+        if self.quantization != "uint8":
+            return score
+        distance = score * self._uint8_step
+        return 1.0 - distance * distance / 2
+    
+    def _format_collection_info(self, collection_info: CollectionInfo) -> Dict[str, Any]:
+        return {
+            "name": self.collection_name,
+            "vectors_count": collection_info.vectors_count,
+            "indexed_vectors_count": collection_info.indexed_vectors_count,
+            "points_count": collection_info.points_count,
+            "segments_count": collection_info.segments_count,
+            "vector_size": collection_info.config.params.vectors.size,
+            "distance_metric": collection_info.config.params.vectors.distance.value,
+            "quantization": _quantization_name(collection_info.config.quantization_config),
+            "status": collection_info.status.value,
+        }
+
+
+class QdrantRetriever(_QdrantRetrieverBase):
+    """
+    Qdrant向量检索器
+    实现基于Qdrant向量数据库的文档存储和检索功能
+    
+    该实现提供高效的向量相似度搜索，适用于：
+    - RAG系统的文档检索
+    - 语义搜索
+    - 文档相似度匹配
+    """
+    
+    @staticmethod
+    def _create_client(url: Optional[str], prefer_grpc: bool, grpc_port: int,
+                       pool_size: int) -> QdrantClient:
+        """按服务地址创建客户端"""
+        if url is None:
+            # 未指定服务地址时使用内存模式，避免文件锁定问题
+            logger.info("Using Qdrant in-memory mode")
+            return QdrantClient(":memory:")
+        
+        return _get_shared_client(url, prefer_grpc, grpc_port, pool_size)
+    
     def _setup_collection(self) -> None:
         """创建或配置向量集合"""
         try:
             # 检查集合是否存在
-            collections = self.client.get_collections().collections
-            collection_exists = any(c.name == self.collection_name for c in collections)
-            
-            if not collection_exists:
+            if not self.client.collection_exists(self.collection_name):
                 logger.info(f"Creating collection: {self.collection_name}")
                 
-                # 配置向量参数
-                vector_config = VectorParams(
-                    size=self.vector_size,
-                    distance=self.distance_metric,
-                    on_disk=self.on_disk_storage
-                )
-                
-                # 使用默认优化器配置
-                optimizers_config = None
-                
-                # 使用默认量化配置（简化配置避免版本兼容问题）
-                quantization_config = None
-                
                 # 创建集合
                 self.client.create_collection(
                     collection_name=self.collection_name,
-                    vectors_config=vector_config,
-                    optimizers_config=optimizers_config,
-                    quantization_config=quantization_config
+                    **self._collection_config()
                 )
+                for field_name, schema in self.payload_indexes:
+                    self.client.create_payload_index(
+                        collection_name=self.collection_name,
+                        field_name=field_name,
+                        field_schema=schema
+                    )
                 
+                self._remember_collection_size(self.vector_size)
                 logger.info(f"Collection '{self.collection_name}' created successfully")
             else:
                 logger.info(f"Collection '{self.collection_name}' already exists")
-                
-                # 验证集合配置
-                collection_info = self.client.get_collection(self.collection_name)
-                actual_size = collection_info.config.params.vectors.size
-                if actual_size != self.vector_size:
-                    logger.warning(
-                        f"Collection vector size ({actual_size}) differs from expected ({self.vector_size})"
-                    )
+            
+            # 集合配置在首次读写时才校验，同一客户端上已确认过的集合不再查询
+            known_size = _COLLECTION_SIZES.get(self.client, {}).get(self.collection_name)
+            self._size_verified = known_size == self.vector_size
                 
         except Exception as e:
             logger.error(f"Failed to setup collection: {e}")
             raise RuntimeError(f"Collection setup failed: {e}") from e
     
-    def add_documents(self, chunks: List[DocumentChunk]) -> None:
+    def _remember_collection_size(self, size: int) -> None:
+        """记录客户端上集合的向量维度"""
+        _COLLECTION_SIZES.setdefault(self.client, {})[self.collection_name] = size
+    
+    def _verify_collection_size(self) -> None:
+        """
+        首次读写时校验已有集合的向量维度
+        
+        Raises:
+            ValueError: 当集合向量维度与检索器不一致时
+        """
+        if self._size_verified:
+            return
+        
+        collection_info = self.client.get_collection(self.collection_name)
+        actual_size = collection_info.config.params.vectors.size
+        self._remember_collection_size(actual_size)
+        if actual_size != self.vector_size:
+            raise ValueError(
+                f"Collection vector size ({actual_size}) "
+                f"does not match expected ({self.vector_size})"
+            )
+        self._size_verified = True
+    
+    def add_documents(self, chunks: List[DocumentChunk],
+                      embeddings: Optional[np.ndarray] = None) -> None:
         """
         批量添加文档块到向量存储
         
         Args:
-            chunks: 文档分片列表，每个分片应包含embedding向量
+            chunks: 文档分片列表
+            embeddings: 与chunks逐行对应的向量矩阵，None时使用各分片的embedding字段
             
         Raises:
             ValueError: 当分片缺少embedding时
@@ -127,58 +478,91 @@ class QdrantRetriever:
             logger.warning("No chunks provided for indexing")
             return
         
-        logger.info(f"Adding {len(chunks)} document chunks to collection")
+        logger.info("Adding %d document chunks to collection", len(chunks))
         
-        # 准备点数据
-        points = []
-        for i, chunk in enumerate(chunks):
-            if chunk.embedding is None or len(chunk.embedding) == 0:
-                raise ValueError(f"Chunk {i} is missing embedding vector")
-            
-            if len(chunk.embedding) != self.vector_size:
-                raise ValueError(
-                    f"Chunk {i} embedding dimension ({len(chunk.embedding)}) "
-                    f"does not match collection dimension ({self.vector_size})"
-                )
-            
-            # 生成唯一ID
-            point_id = str(uuid4())
+        self._verify_collection_size()
+        points = self._build_points(chunks, embeddings)
+        batches = self._split_batches(points)
+        
+        try:
+            # 每批都等待完成并检查状态：不等待的批次即使被服务端拒绝也不会报错
+            if self.upsert_parallel > 1 and len(batches) > 1:
+                # 并发提交：请求之间没有先后顺序，全部返回即代表全部写入
+                with ThreadPoolExecutor(self.upsert_parallel) as executor:
+                    statuses = list(executor.map(self._upsert_batch, batches))
+            else:
+                statuses = [self._upsert_batch(batch) for batch in batches]
+            operation_info = next(
+                (info for info in statuses if info.status != "completed"), statuses[-1]
+            )
             
-            # 准备payload（元数据+内容）
-            payload = {
-                "content": chunk.content,
-                "metadata": chunk.metadata,
-                # 添加一些有用的搜索字段
-                "content_length": len(chunk.content),
-                "has_metadata": bool(chunk.metadata),
-            }
+            self._log_upsert_status(operation_info, len(points))
+            self._invalidate_cache()
+                
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            raise RuntimeError(f"Document indexing failed: {e}") from e
+    
+    def add_documents_fused(self, contents: List[str], metadatas: List[Dict[str, Any]],
+                            embeddings: np.ndarray) -> None:
+        """
+        直接由内容、元数据和向量矩阵写入，不构造DocumentChunk和PointStruct
+        
+        向量矩阵按集合的存储类型一次性转换（默认float16，uint8量化时为uint8）后
+        整块交给客户端，由客户端逐批序列化，不在内存中展开整个矩阵的Python列表。
+        
+        Args:
+            contents: 文档内容列表
+            metadatas: 与contents逐一对应的元数据列表
+            embeddings: 形状为 (len(contents), vector_size) 的向量矩阵
             
-            # 创建点结构
-            point = PointStruct(
-                id=point_id,
-                vector=chunk.embedding,
-                payload=payload
+        Raises:
+            ValueError: 当数量或维度不匹配、或向量包含NaN/无穷值时
+            RuntimeError: 当存储操作失败时
+        """
+        if not contents:
+            logger.warning("No chunks provided for indexing")
+            return
+        
+        if len(metadatas) != len(contents):
+            raise ValueError(
+                f"Got {len(metadatas)} metadata entries for {len(contents)} contents"
             )
-            points.append(point)
+        
+        self._verify_collection_size()
+        vectors = self._storage_matrix(embeddings, len(contents))
+        metadatas = [dict(metadata) for metadata in metadatas]
+        logger.info("Adding %d document chunks to collection", len(contents))
         
         try:
-            # 批量插入
-            operation_info = self.client.upsert(
+            self.client.upload_collection(
                 collection_name=self.collection_name,
-                points=points,
-                wait=True  # 等待操作完成
+                vectors=vectors,
+                payload=[
+                    {"content": content, "metadata": metadata}
+                    for content, metadata in zip(contents, metadatas)
+                ],
+                ids=[point_id(content, metadata) for content, metadata in zip(contents, metadatas)],
+                batch_size=self.upsert_batch_size,
+                parallel=self.upsert_parallel,
+                wait=True
             )
+            logger.info("Successfully added %d documents", len(contents))
+            self._invalidate_cache()
             
-            if operation_info.status == "completed":
-                logger.info(f"Successfully added {len(points)} documents")
-            else:
-                logger.warning(f"Indexing operation status: {operation_info.status}")
-                
         except Exception as e:
             logger.error(f"Failed to add documents: {e}")
             raise RuntimeError(f"Document indexing failed: {e}") from e
     
-    def search(self, query_embedding: List[float], top_k: int = 3) -> List[SearchResult]:
+    def _upsert_batch(self, points: List[PointStruct]):
+        """写入一批点并等待完成"""
+        return self.client.upsert(
+            collection_name=self.collection_name,
+            points=points,
+            wait=True
+        )
+    
+    def search(self, query_embedding: Vector, top_k: int = 3) -> List[SearchResult]:
         """
         相似度检索
         
@@ -193,50 +577,97 @@ class QdrantRetriever:
             ValueError: 当查询向量维度不匹配时
             RuntimeError: 当检索操作失败时
         """
-        if not query_embedding:
-            raise ValueError("Query embedding cannot be empty")
+        if self.cache is not None:
+            self._check_query(query_embedding, top_k)
+            cached_results = self.cache.get(query_embedding, top_k)
+            if cached_results is not None:
+                return cached_results
         
-        if len(query_embedding) != self.vector_size:
-            raise ValueError(
-                f"Query embedding dimension ({len(query_embedding)}) "
-                f"does not match collection dimension ({self.vector_size})"
-            )
+        results = list(self.isearch(query_embedding, top_k))
         
-        if top_k <= 0:
-            raise ValueError("top_k must be positive")
+        if self.cache is not None:
+            self.cache.put(query_embedding, top_k, results)
+        
+        logger.debug("Found %d results", len(results))
+        return results
+    
+    def isearch(self, query_embedding: Vector, top_k: int = 3) -> Iterator[SearchResult]:
+        """
+        相似度检索的生成器版本，逐条产出SearchResult
         
-        logger.debug(f"Searching for {top_k} similar documents")
+        只消费前几条结果（如top-1重排、按分数阈值提前停止）时，
+        未消费的命中不会被转换为SearchResult。不经过语义缓存。
+        
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回结果数量，默认3
+            
+        Yields:
+            SearchResult: 按相似度降序产出的检索结果
+            
+        Raises:
+            ValueError: 当查询向量维度不匹配时
+            RuntimeError: 当检索操作失败时
+        """
+        self._check_query(query_embedding, top_k)
+        self._verify_collection_size()
+        logger.debug("Searching for %d similar documents", top_k)
         
         try:
             # 执行向量搜索
-            search_results = self.client.search(
+            search_results = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
+                query=self._query_vector(query_embedding),
                 limit=top_k,
-                with_payload=True,  # 包含payload信息
+                search_params=self._search_params,
+                with_payload=_RESULT_PAYLOAD,  # 只返回结果需要的payload字段
                 with_vectors=False,  # 不返回向量（节省带宽）
                 score_threshold=None,  # 不设置阈值，返回top_k结果
-            )
+            ).points
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            raise RuntimeError(f"Search operation failed: {e}") from e
+        
+        # 按需转换为SearchResult格式
+        yield from self._iter_results(search_results)
+    
+    def search_many(self, query_embeddings: List[Vector], top_k: int = 3) -> List[List[SearchResult]]:
+        """
+        批量相似度检索，所有查询在一次请求中提交，服务端并行执行
+        
+        Args:
+            query_embeddings: 查询向量列表
+            top_k: 每个查询返回的结果数量，默认3
             
-            # 转换为SearchResult格式
-            results = []
-            for hit in search_results:
-                result = SearchResult(
-                    content=hit.payload["content"],
-                    metadata=hit.payload["metadata"],
-                    score=hit.score
-                )
-                results.append(result)
+        Returns:
+            List[List[SearchResult]]: 与查询逐一对应的检索结果
             
-            logger.debug(f"Found {len(results)} results")
-            return results
+        Raises:
+            ValueError: 当查询向量维度不匹配时
+            RuntimeError: 当检索操作失败时
+        """
+        if len(query_embeddings) == 0:
+            return []
+        
+        for query_embedding in query_embeddings:
+            self._check_query(query_embedding, top_k)
+        self._verify_collection_size()
+        
+        logger.debug("Batch searching %d queries", len(query_embeddings))
+        
+        try:
+            batch_results = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=self._query_requests(query_embeddings, top_k)
+            )
+            return [self._to_results(response.points) for response in batch_results]
             
         except Exception as e:
-            logger.error(f"Search failed: {e}")
-            raise RuntimeError(f"Search operation failed: {e}") from e
+            logger.error(f"Batch search failed: {e}")
+            raise RuntimeError(f"Batch search operation failed: {e}") from e
     
     def search_with_filter(self, 
-                          query_embedding: List[float], 
+                          query_embedding: Vector, 
                           top_k: int = 3,
                           metadata_filter: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
         """
@@ -249,45 +680,31 @@ class QdrantRetriever:
             
         Returns:
             List[SearchResult]: 过滤后的检索结果
+            
+        Raises:
+            ValueError: 当查询向量维度不匹配时
+            RuntimeError: 当检索操作失败时
         """
+        self._check_query(query_embedding, top_k)
+        self._verify_collection_size()
+        
         # 构建过滤条件
-        query_filter = None
-        if metadata_filter:
-            from qdrant_client.models import Filter, FieldCondition, MatchValue
-            
-            conditions = []
-            for key, value in metadata_filter.items():
-                condition = FieldCondition(
-                    key=f"metadata.{key}",
-                    match=MatchValue(value=value)
-                )
-                conditions.append(condition)
-            
-            if conditions:
-                query_filter = Filter(must=conditions)
+        query_filter = self._build_filter(metadata_filter)
         
         try:
             # 执行过滤搜索
-            search_results = self.client.search(
+            search_results = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
+                query=self._query_vector(query_embedding),
                 query_filter=query_filter,
                 limit=top_k,
-                with_payload=True,
+                search_params=self._search_params,
+                with_payload=_RESULT_PAYLOAD,
                 with_vectors=False,
-            )
+            ).points
             
             # 转换结果
-            results = []
-            for hit in search_results:
-                result = SearchResult(
-                    content=hit.payload["content"],
-                    metadata=hit.payload["metadata"],
-                    score=hit.score
-                )
-                results.append(result)
-            
-            return results
+            return self._to_results(search_results)
             
         except Exception as e:
             logger.error(f"Filtered search failed: {e}")
@@ -296,32 +713,36 @@ class QdrantRetriever:
     def get_collection_info(self) -> Dict[str, Any]:
         """获取集合信息"""
         try:
-            collection_info = self.client.get_collection(self.collection_name)
-            return {
-                "name": self.collection_name,
-                "vectors_count": collection_info.vectors_count,
-                "indexed_vectors_count": collection_info.indexed_vectors_count,
-                "points_count": collection_info.points_count,
-                "segments_count": collection_info.segments_count,
-                "vector_size": collection_info.config.params.vectors.size,
-                "distance_metric": collection_info.config.params.vectors.distance.value,
-                "status": collection_info.status.value,
-            }
+            return self._format_collection_info(self.client.get_collection(self.collection_name))
         except Exception as e:
             logger.error(f"Failed to get collection info: {e}")
             return {"error": str(e)}
     
     def clear_collection(self) -> None:
-        """清空集合中的所有数据"""
+        """
+        清空集合中的所有数据
+        
+        集合维度已确认时只删除全部点，保留集合配置和payload索引，不重建集合；
+        否则删除并按当前配置重建集合
+        """
         try:
-            self.client.delete_collection(self.collection_name)
-            self._setup_collection()
-            logger.info(f"Collection '{self.collection_name}' cleared and recreated")
+            if self._size_verified:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=FilterSelector(filter=Filter()),
+                    wait=True
+                )
+                logger.info(f"Collection '{self.collection_name}' cleared")
+            else:
+                self.client.delete_collection(self.collection_name)
+                self._setup_collection()
+                logger.info(f"Collection '{self.collection_name}' cleared and recreated")
+            self._invalidate_cache()
         except Exception as e:
             logger.error(f"Failed to clear collection: {e}")
             raise RuntimeError(f"Clear collection failed: {e}") from e
     
-    def delete_documents(self, ids: List[str]) -> None:
+    def delete_documents(self, ids: List[Union[int, str]]) -> None:
         """
         删除指定ID的文档
         
@@ -337,29 +758,89 @@ class QdrantRetriever:
                 points_selector=ids,
                 wait=True
             )
+            self._invalidate_cache()
             logger.info(f"Deleted {len(ids)} documents")
         except Exception as e:
             logger.error(f"Failed to delete documents: {e}")
             raise RuntimeError(f"Delete operation failed: {e}") from e
 
 
-# 创建默认实例
-default_retriever = QdrantRetriever()
+# 默认实例在首次使用时才创建，导入模块时不启动内存模式的Qdrant
+_default_retriever: Optional[QdrantRetriever] = None
+
+
+def get_default_retriever() -> QdrantRetriever:
+    """获取默认Qdrant检索器实例"""
+    global _default_retriever
+    if _default_retriever is None:
+        _default_retriever = QdrantRetriever()
+    return _default_retriever
+
+
+def __getattr__(name: str):
+    # 兼容旧的模块级 default_retriever 属性
+    if name == "default_retriever":
+        return get_default_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=256)
+def _compile_filter(conditions: Tuple[Tuple[str, Any], ...]) -> Filter:
+    """由 (元数据键, 值) 条件构造Filter"""
+    return Filter(must=[
+        FieldCondition(key=f"metadata.{key}", match=MatchValue(value=value))
+        for key, value in conditions
+    ])
+
+
+def _quantization_name(quantization_config) -> Optional[str]:
+    """集合量化配置的名称（"int8"/"binary"），未启用量化时为None"""
+    if isinstance(quantization_config, ScalarQuantization):
+        return quantization_config.scalar.type.value
+    if isinstance(quantization_config, BinaryQuantization):
+        return "binary"
+    return None
+
+
+def _get_shared_client(url: str, prefer_grpc: bool, grpc_port: int,
+                       pool_size: int) -> QdrantClient:
+    """
+    获取远程服务的共享客户端，首次请求时创建
+    
+    内存模式的客户端各自持有独立的数据，不参与共享
+    """
+    key = (url, prefer_grpc, grpc_port)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            # 远程服务：gRPC比REST序列化开销小得多，连接池支持并发请求
+            logger.info("Using Qdrant server at %s (prefer_grpc=%s)", url, prefer_grpc)
+            client = QdrantClient(
+                url=url,
+                prefer_grpc=prefer_grpc,
+                grpc_port=grpc_port,
+                pool_size=pool_size
+            )
+            _CLIENTS[key] = client
+        return client
 
 
 def create_retriever(collection_name: str = "documents", 
-                    vector_size: int = 1024) -> QdrantRetriever:
+                    vector_size: int = 1024,
+                    client: Optional[QdrantClient] = None) -> QdrantRetriever:
     """
     便捷函数：创建Qdrant检索器实例
     
     Args:
         collection_name: 集合名称
         vector_size: 向量维度
+        client: 复用的Qdrant客户端，None时新建内存模式客户端
         
     Returns:
         QdrantRetriever: 检索器实例
     """
     return QdrantRetriever(
         collection_name=collection_name,
-        vector_size=vector_size
+        vector_size=vector_size,
+        client=client
     )
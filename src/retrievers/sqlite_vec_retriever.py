@@ -0,0 +1,329 @@
+"""
+sqlite-vec向量检索器实现
+使用进程内的sqlite + sqlite-vec扩展进行文档存储和检索，适合小规模单机场景
+"""
+
+from typing import List, Dict, Any, Optional
+import logging
+import re
+import sqlite3
+
+import numpy as np
+
+from ..model import DocumentChunk, SearchResult
+from .. import _json
+from ._ids import point_id
+from ._vectors import Vector, stack_embeddings
+
+
+logger = logging.getLogger(__name__)
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_MAX_ROWID = (1 << 63) - 1
+
+
+class SqliteVecRetriever:
+    """
+    sqlite-vec向量检索器，按结构实现 VectorStore 协议
+    
+    文档内容和元数据存放在普通表中，向量存放在vec0虚拟表中，
+    两者通过rowid关联。检索在进程内完成，没有网络往返。
+    
+    依赖可选包 sqlite-vec，并要求Python的sqlite3支持加载扩展。
+    
+    quantization="int8" 时向量按 round(x * 127) 量化为int8存储，
+    对归一化向量而言余弦排序基本不变，内存占用降为float32的1/4。
+    """
+    
+    def __init__(self,
+                 collection_name: str = "documents",
+                 vector_size: int = 1024,
+                 db_path: str = ":memory:",
+                 upsert_batch_size: int = 256,
+                 quantization: Optional[str] = None):
+        """
+        初始化sqlite-vec检索器
+        
+        Args:
+            collection_name: 集合名称（用作表名前缀），默认为"documents"
+            vector_size: 向量维度，默认1024（BGE-large）
+            db_path: sqlite数据库路径，默认内存数据库
+            upsert_batch_size: 单次写入事务的分片数量，默认256
+            quantization: 向量量化方式，None为float32，"int8"为标量量化
+        """
+        if not _NAME_PATTERN.match(collection_name):
+            raise ValueError(f"Invalid collection name: {collection_name}")
+        
+        if quantization not in (None, "int8"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        
+        self.collection_name = collection_name
+        self.vector_size = vector_size
+        self.db_path = db_path
+        self.upsert_batch_size = upsert_batch_size
+        self.quantization = quantization
+        
+        self._chunks_table = f"{collection_name}_chunks"
+        self._vec_table = f"{collection_name}_vec"
+        
+        # int8向量需要用vec_int8()声明参数类型，否则会被当作float32解析
+        self._vec_param = "vec_int8(?)" if quantization == "int8" else "?"
+        
+        self.conn = self._connect(db_path)
+        logger.info(f"Using sqlite-vec store: {db_path}")
+        
+        self._setup_collection()
+    
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        """打开数据库连接并加载sqlite-vec扩展"""
+        try:
+            import sqlite_vec
+        except ImportError as e:
+            raise RuntimeError("sqlite-vec is not installed, run: pip install sqlite-vec") from e
+        
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.enable_load_extension(True)
+            sqlite_vec.load(conn)
+            conn.enable_load_extension(False)
+        except AttributeError as e:
+            conn.close()
+            raise RuntimeError("This Python build does not support loading sqlite extensions") from e
+        
+        return conn
+    
+    def _setup_collection(self) -> None:
+        """创建或配置向量表"""
+        element_type = "int8" if self.quantization == "int8" else "float"
+        
+        try:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._chunks_table} ("
+                "id INTEGER PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self.conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self._vec_table} USING vec0("
+                f"embedding {element_type}[{self.vector_size}] distance_metric=cosine)"
+            )
+            self.conn.commit()
+            logger.info(f"Collection '{self.collection_name}' is ready")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to setup collection: {e}")
+            raise RuntimeError(f"Collection setup failed: {e}") from e
+    
+    def _to_blob(self, embedding) -> bytes:
+        """将向量序列化为字节串（float32或量化后的int8）"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self.quantization == "int8":
+            return np.clip(np.rint(vector * 127.0), -128, 127).astype(np.int8).tobytes()
+        return vector.tobytes()
+    
+    def add_documents(self, chunks: List[DocumentChunk],
+                      embeddings: Optional[np.ndarray] = None) -> None:
+        """
+        批量添加文档块到向量存储
+        
+        同一分片（内容和元数据相同）重复写入时覆盖原有的行，重新索引不会产生重复数据
+        
+        Args:
+            chunks: 文档分片列表
+            embeddings: 与chunks逐行对应的向量矩阵，None时使用各分片的embedding字段
+        
+        Raises:
+            ValueError: 当分片缺少embedding时
+            RuntimeError: 当存储操作失败时
+        """
+        if not chunks:
+            logger.warning("No chunks provided for indexing")
+            return
+        
+        logger.info("Adding %d document chunks to collection", len(chunks))
+        
+        vectors = stack_embeddings(chunks, embeddings, self.vector_size)
+        
+        try:
+            batch_size = self.upsert_batch_size
+            for start in range(0, len(chunks), batch_size):
+                # 同一批内的重复分片只保留最后一次出现
+                rows = {}
+                for chunk, vector in zip(chunks[start:start + batch_size],
+                                         vectors[start:start + batch_size]):
+                    metadata = dict(chunk.metadata)
+                    rows[row_id(chunk.content, metadata)] = (chunk.content, metadata, vector)
+                
+                with self.conn:
+                    # vec0虚拟表不支持REPLACE，已有的向量先删除再写入
+                    self.conn.executemany(
+                        f"DELETE FROM {self._vec_table} WHERE rowid = ?",
+                        [(rowid,) for rowid in rows]
+                    )
+                    self.conn.executemany(
+                        f"INSERT OR REPLACE INTO {self._chunks_table} (id, content, metadata) VALUES (?, ?, ?)",
+                        [(rowid, content, _json.dumps(metadata)) for rowid, (content, metadata, _) in rows.items()]
+                    )
+                    self.conn.executemany(
+                        f"INSERT INTO {self._vec_table} (rowid, embedding) VALUES (?, {self._vec_param})",
+                        [(rowid, self._to_blob(vector)) for rowid, (_, _, vector) in rows.items()]
+                    )
+            
+            logger.info("Successfully added %d documents", len(chunks))
+        
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add documents: {e}")
+            raise RuntimeError(f"Document indexing failed: {e}") from e
+    
+    def search(self, query_embedding: Vector, top_k: int = 3) -> List[SearchResult]:
+        """
+        相似度检索
+        
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回结果数量，默认3
+        
+        Returns:
+            List[SearchResult]: 按相似度降序排列的检索结果
+        
+        Raises:
+            ValueError: 当查询向量维度不匹配时
+            RuntimeError: 当检索操作失败时
+        """
+        if query_embedding is None or len(query_embedding) == 0:
+            raise ValueError("Query embedding cannot be empty")
+        
+        if len(query_embedding) != self.vector_size:
+            raise ValueError(
+                f"Query embedding dimension ({len(query_embedding)}) "
+                f"does not match collection dimension ({self.vector_size})"
+            )
+        
+        if top_k <= 0:
+            raise ValueError("top_k must be positive")
+        
+        logger.debug("Searching for %d similar documents", top_k)
+        
+        try:
+            rows = self.conn.execute(
+                f"WITH knn AS ("
+                f"  SELECT rowid, distance FROM {self._vec_table}"
+                f"  WHERE embedding MATCH {self._vec_param} AND k = ?"
+                f") "
+                f"SELECT c.content, c.metadata, knn.distance FROM knn "
+                f"JOIN {self._chunks_table} c ON c.id = knn.rowid "
+                f"ORDER BY knn.distance",
+                (self._to_blob(query_embedding), top_k)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Search failed: {e}")
+            raise RuntimeError(f"Search operation failed: {e}") from e
+        
+        results = self._to_results(rows)
+        logger.debug("Found %d results", len(results))
+        return results
+    
+    def search_with_filter(self,
+                           query_embedding: Vector,
+                           top_k: int = 3,
+                           metadata_filter: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
+        """
+        带过滤条件的相似度检索（先按元数据过滤，再对剩余分片精确计算距离）
+        
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回结果数量
+            metadata_filter: 元数据过滤条件
+        
+        Returns:
+            List[SearchResult]: 过滤后的检索结果
+        """
+        if not metadata_filter:
+            return self.search(query_embedding, top_k)
+        
+        conditions = []
+        params: List[Any] = [self._to_blob(query_embedding)]
+        for key, value in metadata_filter.items():
+            conditions.append("json_extract(c.metadata, ?) = ?")
+            params.extend([f'$."{key}"', value])
+        params.append(top_k)
+        
+        try:
+            rows = self.conn.execute(
+                f"SELECT c.content, c.metadata, vec_distance_cosine(v.embedding, {self._vec_param}) AS distance "
+                f"FROM {self._chunks_table} c JOIN {self._vec_table} v ON v.rowid = c.id "
+                f"WHERE {' AND '.join(conditions)} "
+                f"ORDER BY distance LIMIT ?",
+                params
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Filtered search failed: {e}")
+            raise RuntimeError(f"Filtered search operation failed: {e}") from e
+        
+        return self._to_results(rows)
+    
+    @staticmethod
+    def _to_results(rows) -> List[SearchResult]:
+        """将查询结果转换为SearchResult，余弦距离转换为余弦相似度"""
+        return [
+            SearchResult(
+                content=content,
+                metadata=_json.loads(metadata),
+                score=1.0 - distance
+            )
+            for content, metadata, distance in rows
+        ]
+    
+    def get_collection_info(self) -> Dict[str, Any]:
+        """获取集合信息"""
+        try:
+            count = self.conn.execute(f"SELECT COUNT(*) FROM {self._chunks_table}").fetchone()[0]
+            return {
+                "name": self.collection_name,
+                "vectors_count": count,
+                "indexed_vectors_count": count,
+                "points_count": count,
+                "segments_count": 1,
+                "vector_size": self.vector_size,
+                "distance_metric": "Cosine",
+                "status": "green",
+            }
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get collection info: {e}")
+            return {"error": str(e)}
+    
+    def clear_collection(self) -> None:
+        """清空集合中的所有数据"""
+        try:
+            with self.conn:
+                self.conn.execute(f"DROP TABLE IF EXISTS {self._vec_table}")
+                self.conn.execute(f"DROP TABLE IF EXISTS {self._chunks_table}")
+            self._setup_collection()
+            logger.info(f"Collection '{self.collection_name}' cleared and recreated")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to clear collection: {e}")
+            raise RuntimeError(f"Clear collection failed: {e}") from e
+    
+    def delete_documents(self, ids: List[int]) -> None:
+        """
+        删除指定ID的文档
+        
+        Args:
+            ids: 要删除的文档ID列表，由 row_id(内容, 元数据) 得到
+        """
+        if not ids:
+            return
+        
+        try:
+            placeholders = ",".join("?" * len(ids))
+            with self.conn:
+                self.conn.execute(f"DELETE FROM {self._vec_table} WHERE rowid IN ({placeholders})", ids)
+                self.conn.execute(f"DELETE FROM {self._chunks_table} WHERE id IN ({placeholders})", ids)
+            logger.info(f"Deleted {len(ids)} documents")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to delete documents: {e}")
+            raise RuntimeError(f"Delete operation failed: {e}") from e
+
+
+def row_id(content: str, metadata: Dict[str, Any]) -> int:
+    """分片在sqlite中的行ID：确定性点ID的低63位（sqlite整数为有符号64位）"""
+    return point_id(content, metadata) & _MAX_ROWID
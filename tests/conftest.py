@@ -0,0 +1,66 @@
+"""
+pytest共用配置与fixture
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+from src.retrievers import AsyncQdrantRetriever
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = sys.platform != "win32"
+except ImportError:  # pragma: no cover - 取决于运行环境
+    UVLOOP_AVAILABLE = False
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sequential", action="store_true",
+                     help="集成测试逐条检索查询（测量单次延迟），默认批量检索")
+
+
+@pytest.fixture(scope="session")
+def sequential(request) -> bool:
+    """是否逐条检索查询"""
+    return request.config.getoption("--sequential")
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy() -> asyncio.AbstractEventLoopPolicy:
+    """异步测试的事件循环策略：安装了uvloop时使用uvloop，降低每次await的调度开销"""
+    if UVLOOP_AVAILABLE:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+@pytest.fixture(scope="session")
+def qdrant_client() -> AsyncQdrantClient:
+    """会话内共享的内存模式客户端，不产生磁盘和网络开销"""
+    return AsyncQdrantClient(":memory:")
+
+
+@pytest.fixture
+def make_retriever(qdrant_client):
+    """
+    在共享客户端上创建异步检索器
+
+    集合名追加pytest-xdist的worker编号，多个worker并行运行时互不冲突。
+    测试集合只有百余个点，使用较小的HNSW参数即可，建索引开销远低于默认配置
+    """
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+    def factory(collection_name: str, vector_size: int = 1024, **options) -> AsyncQdrantRetriever:
+        return AsyncQdrantRetriever(
+            collection_name=f"{collection_name}_{worker_id}",
+            vector_size=vector_size,
+            client=qdrant_client,
+            hnsw_m=8,
+            hnsw_ef_construct=64,
+            **options
+        )
+
+    return factory
@@ -8,7 +8,7 @@ import numpy as np
 from unittest.mock import Mock, patch
 from typing import List
 
-from src.embeddings import BGEEmbedder, default_embedder, embed_text
+from src.embeddings import BGEEmbedder, EmbeddingCache, default_embedder, embed_text, get_default_embedder
 
 
 class TestBGEEmbedder:
@@ -25,11 +25,32 @@ class TestBGEEmbedder:
         """测试自定义参数初始化"""
         model_name = "custom/model"
         device = "cpu"
-        embedder = BGEEmbedder(model_name=model_name, device=device)
+        embedder = BGEEmbedder(model_name=model_name, device=device, batch_size=16)
         assert embedder.model_name == model_name
         assert embedder.device == device
+        assert embedder.batch_size == 16
 
-    @patch('src.embeddings.bge_embedder.SentenceTransformer')
+    def test_init_invalid_precision(self):
+        """测试不支持的推理精度"""
+        with pytest.raises(ValueError, match="Unsupported precision"):
+            BGEEmbedder(precision="int4")
+
+    def test_init_invalid_backend(self):
+        """测试不支持的推理后端"""
+        with pytest.raises(ValueError, match="Unsupported backend"):
+            BGEEmbedder(backend="tensorrt")
+
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_onnx_backend_loading(self, mock_transformer):
+        """测试ONNX后端加载"""
+        mock_transformer.return_value = Mock(device="cpu")
+        
+        embedder = BGEEmbedder(backend="onnx")
+        _ = embedder.model
+        
+        mock_transformer.assert_called_once_with("BAAI/bge-large-zh-v1.5", device=None, backend="onnx")
+
+    @patch('sentence_transformers.SentenceTransformer')
     def test_lazy_model_loading(self, mock_transformer):
         """测试懒加载模型机制"""
         # Mock the SentenceTransformer
@@ -52,13 +73,13 @@ class TestBGEEmbedder:
         assert model2 is mock_model
         assert mock_transformer.call_count == 1  # 只调用一次
 
-    @patch('src.embeddings.bge_embedder.SentenceTransformer')
+    @patch('sentence_transformers.SentenceTransformer')
     def test_embed_single_text(self, mock_transformer):
         """测试单个文本向量化"""
         # Mock the model
         mock_model = Mock()
         mock_model.device = "cpu"
-        mock_model.encode.return_value = np.array([[0.1, 0.2, 0.3]])
+        mock_model.encode.return_value = np.array([[3.0, 0.0, 4.0]])
         mock_transformer.return_value = mock_model
         
         embedder = BGEEmbedder()
@@ -68,28 +89,30 @@ class TestBGEEmbedder:
         result = embedder.embed(text)
         
         # 验证结果
-        assert isinstance(result, list)
-        assert len(result) == 1
-        assert isinstance(result[0], list)
-        assert len(result[0]) == 3
-        assert result == [[0.1, 0.2, 0.3]]
+        assert isinstance(result, np.ndarray)
+        assert result.shape == (1, 3)
+        assert result.dtype == np.float32
+        # 归一化在模型外完成
+        np.testing.assert_allclose(result, [[0.6, 0.0, 0.8]], rtol=1e-6)
         
         # 验证模型调用
         mock_model.encode.assert_called_once_with(
             [text],
-            normalize_embeddings=True,
+            batch_size=64,
+            normalize_embeddings=False,
+            convert_to_numpy=True,
             show_progress_bar=False
         )
 
-    @patch('src.embeddings.bge_embedder.SentenceTransformer')
+    @patch('sentence_transformers.SentenceTransformer')
     def test_embed_multiple_texts(self, mock_transformer):
         """测试多个文本向量化"""
         # Mock the model
         mock_model = Mock()
         mock_model.device = "cpu"
         mock_model.encode.return_value = np.array([
-            [0.1, 0.2, 0.3],
-            [0.4, 0.5, 0.6]
+            [0.6, 0.8, 0.0],
+            [0.0, 0.0, 1.0]
         ])
         mock_transformer.return_value = mock_model
         
@@ -100,19 +123,20 @@ class TestBGEEmbedder:
         result = embedder.embed(texts)
         
         # 验证结果
-        assert isinstance(result, list)
-        assert len(result) == 2
-        assert all(isinstance(emb, list) for emb in result)
-        assert result == [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+        assert isinstance(result, np.ndarray)
+        assert result.shape == (2, 3)
+        np.testing.assert_allclose(result, [[0.6, 0.8, 0.0], [0.0, 0.0, 1.0]], rtol=1e-6)
         
         # 验证模型调用
         mock_model.encode.assert_called_once_with(
             texts,
-            normalize_embeddings=True,
+            batch_size=64,
+            normalize_embeddings=False,
+            convert_to_numpy=True,
             show_progress_bar=False
         )
 
-    @patch('src.embeddings.bge_embedder.SentenceTransformer')
+    @patch('sentence_transformers.SentenceTransformer')
     def test_embed_progress_bar_for_large_batch(self, mock_transformer):
         """测试大批量文本显示进度条"""
         # Mock the model
@@ -130,10 +154,72 @@ class TestBGEEmbedder:
         # 验证显示进度条
         mock_model.encode.assert_called_once_with(
             texts,
-            normalize_embeddings=True,
+            batch_size=64,
+            normalize_embeddings=False,
+            convert_to_numpy=True,
             show_progress_bar=True
         )
 
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_embed_token_budget_batches(self, mock_transformer):
+        """测试按token预算分批：只分词一次，补齐后直接前向计算，并按原顺序返回结果"""
+        torch = pytest.importorskip("torch")
+        
+        mock_model = Mock()
+        mock_model.device = "cpu"
+        mock_model.max_seq_length = 512
+        mock_model.tokenizer.side_effect = lambda texts, **kwargs: {
+            "input_ids": [[0] * len(text) for text in texts]
+        }
+        # 补齐后的批次只记录每条的长度，前向计算输出 [1, 长度]
+        mock_model.tokenizer.pad.side_effect = lambda features, **kwargs: {
+            "input_ids": torch.tensor([[float(len(f["input_ids"]))] for f in features])
+        }
+        mock_model.forward.side_effect = lambda features: {
+            "sentence_embedding": torch.cat(
+                [torch.ones_like(features["input_ids"]), features["input_ids"]], dim=1
+            )
+        }
+        mock_transformer.return_value = mock_model
+        
+        embedder = BGEEmbedder(token_budget=8)
+        texts = ["aa", "aaaaaa", "a", "aaa"]
+        result = embedder.embed(texts)
+        
+        # 按长度降序装批：[6]、[3, 2]、[1]
+        assert embedder._pack_batches([2, 6, 1, 3]) == [[1], [3, 0], [2]]
+        assert mock_model.tokenizer.call_count == 1
+        mock_model.encode.assert_not_called()
+        assert [len(call.args[0]) for call in mock_model.tokenizer.pad.call_args_list] == [1, 2, 1]
+        np.testing.assert_allclose(result[:, 1] / result[:, 0], [2.0, 6.0, 1.0, 3.0], rtol=1e-6)
+
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_embed_query_truncates_long_query(self, mock_transformer):
+        """测试超长查询由分词器截断，末尾的[SEP]被保留"""
+        torch = pytest.importorskip("torch")
+        
+        def tokenize(texts, truncation, max_length, return_tensors):
+            ids = [101] + [1] * len(texts[0]) + [102]
+            if truncation and len(ids) > max_length:
+                ids = ids[:max_length - 1] + [102]
+            return {"input_ids": torch.tensor([ids]), "attention_mask": torch.ones(1, len(ids))}
+        
+        mock_model = Mock()
+        mock_model.device = "cpu"
+        mock_model.max_seq_length = 512
+        mock_model.tokenizer.side_effect = tokenize
+        mock_model.forward.return_value = {"sentence_embedding": torch.tensor([[3.0, 4.0]])}
+        mock_transformer.return_value = mock_model
+        
+        embedder = BGEEmbedder()
+        result = embedder.embed_query("很长的查询" * 100, max_length=64)
+        
+        features = mock_model.forward.call_args.args[0]
+        assert features["input_ids"].shape == (1, 64)
+        assert features["input_ids"][0, 0].item() == 101
+        assert features["input_ids"][0, -1].item() == 102
+        np.testing.assert_allclose(result, [0.6, 0.8], rtol=1e-6)
+
     def test_embed_empty_input(self):
         """测试空输入处理"""
         embedder = BGEEmbedder()
@@ -158,7 +244,7 @@ class TestBGEEmbedder:
         with pytest.raises(ValueError, match="All inputs must be non-empty strings"):
             embedder.embed(["有效文本", 123, "另一个有效文本"])
 
-    @patch('src.embeddings.bge_embedder.SentenceTransformer')
+    @patch('sentence_transformers.SentenceTransformer')
     def test_embed_model_error_handling(self, mock_transformer):
         """测试模型错误处理"""
         # Mock the model to raise an exception
@@ -172,7 +258,7 @@ class TestBGEEmbedder:
         with pytest.raises(RuntimeError, match="Failed to generate embeddings"):
             embedder.embed("测试文本")
 
-    @patch('src.embeddings.bge_embedder.SentenceTransformer')
+    @patch('sentence_transformers.SentenceTransformer')
     def test_get_embedding_dimension(self, mock_transformer):
         """测试获取向量维度"""
         mock_model = Mock()
@@ -186,7 +272,7 @@ class TestBGEEmbedder:
         assert dimension == 1024
         mock_model.get_sentence_embedding_dimension.assert_called_once()
 
-    @patch('src.embeddings.bge_embedder.SentenceTransformer')
+    @patch('sentence_transformers.SentenceTransformer')
     def test_get_model_info_loaded(self, mock_transformer):
         """测试获取已加载模型信息"""
         mock_model = Mock()
@@ -223,10 +309,62 @@ class TestBGEEmbedder:
         assert info == expected
 
 
+class TestEmbeddingCache:
+    """向量缓存测试用例"""
+
+    def test_cache_roundtrip(self, tmp_path):
+        """测试缓存读写"""
+        cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+        key = EmbeddingCache.make_key("model", "文本")
+        cache.put_many([(key, np.array([0.5, -0.25, 1.0]))])
+
+        found = cache.get_many([key, EmbeddingCache.make_key("model", "其他")])
+        assert list(found) == [key]
+        assert found[key].dtype == np.float32
+        assert found[key].tolist() == [0.5, -0.25, 1.0]
+        cache.close()
+
+    def test_cache_key_depends_on_model(self):
+        """测试不同模型的缓存键不同"""
+        assert EmbeddingCache.make_key("a", "文本") != EmbeddingCache.make_key("b", "文本")
+
+    def test_cache_namespace_depends_on_settings(self):
+        """测试精度、后端、量化和最大长度不同时缓存命名空间不同"""
+        namespaces = {
+            BGEEmbedder()._cache_namespace,
+            BGEEmbedder(precision="fp16")._cache_namespace,
+            BGEEmbedder(backend="onnx")._cache_namespace,
+            BGEEmbedder(quantize=True)._cache_namespace,
+            BGEEmbedder(max_seq_length=256)._cache_namespace,
+        }
+        assert len(namespaces) == 5
+        assert BGEEmbedder()._cache_namespace == BGEEmbedder(batch_size=16)._cache_namespace
+
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_embed_only_encodes_cache_misses(self, mock_transformer, tmp_path):
+        """测试只对未命中缓存的文本进行向量化"""
+        mock_model = Mock()
+        mock_model.device = "cpu"
+        mock_model.encode.side_effect = [
+            np.array([[0.6, 0.8], [0.8, 0.6]]),
+            np.array([[1.0, 0.0]]),
+        ]
+        mock_transformer.return_value = mock_model
+
+        embedder = BGEEmbedder(cache=EmbeddingCache(str(tmp_path / "emb.sqlite")))
+
+        first = embedder.embed(["第一个文本", "第二个文本"])
+        second = embedder.embed(["第二个文本", "第三个文本"])
+
+        np.testing.assert_allclose(first, [[0.6, 0.8], [0.8, 0.6]], rtol=1e-6)
+        np.testing.assert_allclose(second, [[0.8, 0.6], [1.0, 0.0]], rtol=1e-6)
+        assert mock_model.encode.call_args.args[0] == ["第三个文本"]
+
+
 class TestDefaultEmbedder:
     """测试默认embedder和便捷函数"""
 
-    @patch('src.embeddings.bge_embedder.default_embedder')
+    @patch('src.embeddings.bge_embedder._default_embedder')
     def test_embed_text_function(self, mock_default_embedder):
         """测试便捷函数"""
         mock_default_embedder.embed.return_value = [[0.1, 0.2, 0.3]]
@@ -240,6 +378,7 @@ class TestDefaultEmbedder:
         """测试默认embedder存在"""
         assert default_embedder is not None
         assert isinstance(default_embedder, BGEEmbedder)
+        assert get_default_embedder() is get_default_embedder()
 
 
 class TestIntegration:
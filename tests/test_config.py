@@ -0,0 +1,86 @@
+"""
+配置加载测试
+验证配置缓存默认关闭、遵循XDG_CACHE_HOME，以及文件或默认配置变化时失效
+"""
+
+import os
+
+import pytest
+
+from src.config import DEFAULT_CONFIG, load_config
+
+
+@pytest.fixture
+def cache_home(tmp_path, monkeypatch):
+    """将XDG_CACHE_HOME指向临时目录"""
+    cache_home = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home
+
+
+def _write_config(path, chunk_size: int) -> None:
+    path.write_text(f"chunker:\n  chunk_size: {chunk_size}\n", encoding="utf-8")
+
+
+def _cache_files(cache_home):
+    return sorted((cache_home / "kylions_rag").glob("config_*.pkl"))
+
+
+class TestConfigCache:
+    """配置缓存测试用例"""
+
+    def test_disabled_by_default(self, tmp_path, cache_home):
+        """测试默认不写入缓存"""
+        config_file = tmp_path / "config.yaml"
+        _write_config(config_file, 300)
+
+        assert load_config(str(config_file))['chunker']['chunk_size'] == 300
+        assert not (cache_home / "kylions_rag").exists()
+
+    def test_cache_under_xdg_cache_home(self, tmp_path, cache_home):
+        """测试缓存写入XDG_CACHE_HOME，再次加载得到相同配置"""
+        config_file = tmp_path / "config.yaml"
+        _write_config(config_file, 300)
+
+        first = load_config(str(config_file), use_cache=True)
+        assert len(_cache_files(cache_home)) == 1
+
+        second = load_config(str(config_file), use_cache=True)
+        assert second == first
+        assert len(_cache_files(cache_home)) == 1
+
+    def test_invalidated_by_mtime(self, tmp_path, cache_home):
+        """测试文件大小不变、修改时间变化时缓存失效"""
+        config_file = tmp_path / "config.yaml"
+        _write_config(config_file, 300)
+        load_config(str(config_file), use_cache=True)
+
+        stat = config_file.stat()
+        _write_config(config_file, 400)
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        assert config_file.stat().st_size == stat.st_size
+        assert load_config(str(config_file), use_cache=True)['chunker']['chunk_size'] == 400
+
+    def test_invalidated_by_size(self, tmp_path, cache_home):
+        """测试文件大小变化时缓存失效"""
+        config_file = tmp_path / "config.yaml"
+        _write_config(config_file, 300)
+        stat = config_file.stat()
+        load_config(str(config_file), use_cache=True)
+
+        _write_config(config_file, 3000)
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert load_config(str(config_file), use_cache=True)['chunker']['chunk_size'] == 3000
+
+    def test_invalidated_by_default_config(self, tmp_path, cache_home, monkeypatch):
+        """测试默认配置变化时缓存失效"""
+        config_file = tmp_path / "config.yaml"
+        _write_config(config_file, 300)
+        load_config(str(config_file), use_cache=True)
+
+        monkeypatch.setitem(DEFAULT_CONFIG['query'], 'default_top_k', 7)
+
+        assert load_config(str(config_file), use_cache=True)['query']['default_top_k'] == 7
+        assert len(_cache_files(cache_home)) == 2
@@ -5,14 +5,125 @@
 
 import sys
 import os
+import hashlib
+import json
 from pathlib import Path
+from typing import Tuple
+
+import fitz
+import pytest
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from src.model import ParsedDocument
+from src.parsers import simple_pdf_parser
 from src.parsers.simple_pdf_parser import SimplePDFParser
 from loguru import logger
 
+PDF_PATH = "./data/raw/kylions_handle_book.pdf"
+
+
+CACHE_DIR = Path("data/cache/parsed_pdf")
+
+
+def parse_pdf_cached(parser: SimplePDFParser, pdf_path: str) -> Tuple[ParsedDocument, str, bool]:
+    """
+    解析PDF，结果缓存在 data/cache/parsed_pdf 下
+    
+    缓存键同时包含文件内容和解析器源码的哈希，修改解析器后缓存自动失效；
+    元数据与Markdown一并缓存，命中时返回与实际解析相同的结果
+    
+    Returns:
+        Tuple[ParsedDocument, str, bool]: 解析结果、Markdown文件路径、是否命中缓存
+    """
+    digest = hashlib.blake2b(Path(pdf_path).read_bytes(), digest_size=16)
+    digest.update(Path(simple_pdf_parser.__file__).read_bytes())
+    key = digest.hexdigest()
+    markdown_path = CACHE_DIR / f"{key}.md"
+    metadata_path = CACHE_DIR / f"{key}.json"
+    
+    if markdown_path.exists() and metadata_path.exists():
+        document = ParsedDocument(
+            markdown_content=markdown_path.read_text(encoding="utf-8"),
+            images=[],
+            tables=[],
+            metadata=json.loads(metadata_path.read_text(encoding="utf-8"))
+        )
+        return document, str(markdown_path), True
+    
+    document = parser.parse(pdf_path)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    markdown_path.write_text(document.markdown_content, encoding="utf-8")
+    metadata_path.write_text(json.dumps(document.metadata, ensure_ascii=False), encoding="utf-8")
+    return document, str(markdown_path), False
+
+
+@pytest.fixture(scope="session")
+def parsed_pdf() -> ParsedDocument:
+    """会话内只解析一次的测试PDF"""
+    if not os.path.exists(PDF_PATH):
+        pytest.skip(f"PDF文件不存在: {PDF_PATH}")
+    document, _, _ = parse_pdf_cached(SimplePDFParser(output_dir="data/processed"), PDF_PATH)
+    return document
+
+
+def _reference_line_count(parser: SimplePDFParser, pdf_path: str) -> int:
+    """
+    按整页 get_text() 逐行切分（基线解析器的做法）统计应输出的行数
+    
+    空行保留；过短的行和页眉页脚被跳过，与解析器的过滤规则一致
+    """
+    count = 0
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            text = page.get_text()
+            if not text.strip():
+                continue
+            for line in text.split('\n'):
+                line = line.strip()
+                if not line or (len(line) >= 3 and not parser._should_filter_line(line)):
+                    count += 1
+    return count
+
+
+def _write_block_pdf(path: Path) -> None:
+    """生成两页、每页多个文字块的PDF"""
+    doc = fitz.open()
+    for page_num in range(2):
+        page = doc.new_page()
+        for i in range(4):
+            page.insert_text((72, 72 + 120 * i),
+                             f"Page {page_num} block {i} first line\nPage {page_num} block {i} second line")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_block_line_count(tmp_path):
+    """测试按文字块提取时行数与按整页文本切分一致，块之间不产生多余空行"""
+    pdf_path = tmp_path / "blocks.pdf"
+    _write_block_pdf(pdf_path)
+    parser = SimplePDFParser(output_dir=str(tmp_path / "processed"))
+    
+    content = parser.parse(str(pdf_path)).markdown_content
+    assert content.count("\n") == _reference_line_count(parser, str(pdf_path))
+    assert not content.startswith("\n")
+    assert "\n\n\n" not in content
+
+
+def test_manual_line_count(parsed_pdf):
+    """测试用户手册的行数与按整页文本切分一致"""
+    parser = SimplePDFParser(output_dir="data/processed")
+    assert parsed_pdf.markdown_content.count("\n") == _reference_line_count(parser, PDF_PATH)
+    assert not parsed_pdf.markdown_content.startswith("\n")
+
+
+def test_parsed_pdf_content(parsed_pdf):
+    """测试解析结果非空，且简单解析器不产出图片和表格"""
+    assert parsed_pdf.markdown_content
+    assert parsed_pdf.images == [] and parsed_pdf.tables == []
+
+
 def test_simple_pdf_parser():
     """测试简单PDF解析器功能"""
     
@@ -21,7 +132,7 @@ def test_simple_pdf_parser():
     logger.add(sys.stdout, level="INFO")
     
     # 检查PDF文件是否存在
-    pdf_path = "./data/raw/kylions_handle_book.pdf"
+    pdf_path = PDF_PATH
     if not os.path.exists(pdf_path):
         logger.error(f"PDF文件不存在: {pdf_path}. 请确保测试从项目根目录运行。")
         return False
@@ -32,12 +143,11 @@ def test_simple_pdf_parser():
         # 初始化解析器
         parser = SimplePDFParser(output_dir="data/processed")
         
-        # 解析PDF
+        # 解析PDF（文件内容未变化时直接读取缓存的Markdown）
         logger.info(f"开始解析PDF文件: {pdf_path}")
-        result = parser.parse(pdf_path)
-        
-        # 保存markdown
-        markdown_path = parser.save_markdown(result)
+        result, markdown_path, cached = parse_pdf_cached(parser, pdf_path)
+        if cached:
+            logger.info("文件内容未变化，使用缓存的解析结果")
         
         # 输出结果统计
         logger.success("=== 解析完成 ===")
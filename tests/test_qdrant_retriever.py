@@ -0,0 +1,129 @@
+"""
+Qdrant检索器测试
+验证确定性点ID、重复写入时的覆盖行为和uint8量化的分数换算
+"""
+
+import numpy as np
+import pytest
+from qdrant_client.models import Distance
+
+from src.model import DocumentChunk
+from src.retrievers import QdrantRetriever
+from src.retrievers._ids import point_id
+
+
+def _unit_rows(count: int, dim: int) -> np.ndarray:
+    vectors = np.random.default_rng(0).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _point_count(retriever: QdrantRetriever) -> int:
+    return retriever.client.count(retriever.collection_name).count
+
+
+class TestPointId:
+    """点ID测试用例"""
+
+    def test_deterministic(self):
+        """测试相同内容和元数据得到相同ID，与元数据键的顺序无关"""
+        first = point_id("麒麟系统", {"file_name": "a.pdf", "chunk_index": 0})
+        second = point_id("麒麟系统", {"chunk_index": 0, "file_name": "a.pdf"})
+        assert first == second
+        assert 0 <= first < 2 ** 64
+
+    def test_distinct(self):
+        """测试内容或元数据不同时ID不同"""
+        base = point_id("麒麟系统", {"chunk_index": 0})
+        assert point_id("麒麟系统", {"chunk_index": 1}) != base
+        assert point_id("麒麟操作系统", {"chunk_index": 0}) != base
+
+    def test_independent_of_orjson(self, monkeypatch):
+        """测试ID不受是否安装orjson影响：两者浮点数格式不同的元数据也得到相同ID"""
+        from src import _json
+
+        metadata = {"score": 1e20, "title": "麒麟"}
+        expected = point_id("麒麟系统", metadata)
+        monkeypatch.setattr(_json, "ORJSON_AVAILABLE", not _json.ORJSON_AVAILABLE)
+        assert point_id("麒麟系统", metadata) == expected
+
+
+class TestReindex:
+    """重复写入测试用例"""
+
+    def test_add_documents_twice(self):
+        """测试同一批分片写入两次时覆盖原有的点"""
+        retriever = QdrantRetriever(collection_name="test_readd", vector_size=8)
+        chunks = [
+            DocumentChunk(content=f"文本{i}", metadata={"chunk_index": i}, embedding=vector)
+            for i, vector in enumerate(_unit_rows(3, 8))
+        ]
+
+        retriever.add_documents(chunks)
+        retriever.add_documents(chunks)
+        assert _point_count(retriever) == 3
+
+    def test_add_documents_fused_twice(self):
+        """测试列式写入与逐点写入使用相同的ID"""
+        retriever = QdrantRetriever(collection_name="test_readd_fused", vector_size=8)
+        contents = [f"文本{i}" for i in range(3)]
+        metadatas = [{"chunk_index": i} for i in range(3)]
+        embeddings = _unit_rows(3, 8)
+
+        retriever.add_documents_fused(contents, metadatas, embeddings)
+        retriever.add_documents([
+            DocumentChunk(content=content, metadata=metadata, embedding=vector)
+            for content, metadata, vector in zip(contents, metadatas, embeddings)
+        ])
+        assert _point_count(retriever) == 3
+
+
+class TestUint8Quantization:
+    """客户端uint8量化测试用例"""
+
+    def test_distance_metric(self):
+        """测试uint8量化改用欧氏距离，默认保持余弦，声明已归一化时才用内积代替余弦"""
+        assert QdrantRetriever(collection_name="test_metric_uint8", vector_size=8,
+                               quantization="uint8").distance_metric == Distance.EUCLID
+        assert QdrantRetriever(collection_name="test_metric_cosine",
+                               vector_size=8).distance_metric == Distance.COSINE
+        assert QdrantRetriever(collection_name="test_metric_dot", vector_size=8,
+                               assume_normalized=True).distance_metric == Distance.DOT
+        assert QdrantRetriever(collection_name="test_metric_euclid", vector_size=8, assume_normalized=True,
+                               distance_metric=Distance.EUCLID).distance_metric == Distance.EUCLID
+
+    def test_hit_score(self):
+        """测试量化空间的欧氏距离换算为原始向量的余弦相似度"""
+        retriever = QdrantRetriever(collection_name="test_uint8_score", vector_size=16,
+                                    quantization="uint8", uint8_range=1.0)
+        vectors = _unit_rows(2, 16)
+        quantized = retriever._quantize_uint8(vectors).astype(np.float32)
+        distance = float(np.linalg.norm(quantized[0] - quantized[1]))
+
+        assert retriever._hit_score(distance) == pytest.approx(float(vectors[0] @ vectors[1]), abs=0.02)
+        assert retriever._hit_score(0.0) == 1.0
+
+    def test_search_scores(self):
+        """测试检索结果的分数为余弦相似度：查询自身得分约为1"""
+        retriever = QdrantRetriever(collection_name="test_uint8_search", vector_size=16,
+                                    quantization="uint8", uint8_range=1.0)
+        vectors = _unit_rows(4, 16)
+        retriever.add_documents_fused([f"文本{i}" for i in range(4)],
+                                      [{"chunk_index": i} for i in range(4)], vectors)
+
+        results = retriever.search(vectors[2], top_k=4)
+        assert results[0].metadata["chunk_index"] == 2
+        assert results[0].score == pytest.approx(1.0, abs=0.02)
+        for result in results[1:]:
+            expected = float(vectors[result.metadata["chunk_index"]] @ vectors[2])
+            assert result.score == pytest.approx(expected, abs=0.02)
+
+
+class TestQueryCheck:
+    """查询向量校验测试用例"""
+
+    @pytest.mark.parametrize("method", ["search", "search_with_filter"])
+    def test_dimension_mismatch(self, method):
+        """测试查询向量维度不匹配时各检索方法均抛出ValueError"""
+        retriever = QdrantRetriever(collection_name="test_query_check", vector_size=8)
+        with pytest.raises(ValueError):
+            getattr(retriever, method)(np.ones(4, dtype=np.float32), top_k=3)
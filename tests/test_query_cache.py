@@ -0,0 +1,93 @@
+"""
+语义查询缓存测试
+验证相似度命中、top_k匹配、LRU淘汰和TTL失效
+"""
+
+import pytest
+import numpy as np
+
+from src.query_cache import SemanticQueryCache
+from src.model import SearchResult
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _results(text: str):
+    return [SearchResult(content=text, metadata={"chunk_index": 0}, score=0.9)]
+
+
+class TestSemanticQueryCache:
+    """语义查询缓存测试用例"""
+
+    def test_invalid_capacity(self):
+        """测试非法容量"""
+        with pytest.raises(ValueError):
+            SemanticQueryCache(capacity=0)
+
+    def test_hit_on_similar_query(self):
+        """测试相近查询命中缓存"""
+        cache = SemanticQueryCache(threshold=0.95)
+        cache.put(_unit([1.0, 0.0, 0.0]), 3, _results("安装软件"))
+
+        hit = cache.get(_unit([1.0, 0.1, 0.0]), 3)
+        assert hit is not None
+        assert hit[0].content == "安装软件"
+
+        assert cache.get(_unit([0.0, 1.0, 0.0]), 3) is None
+
+    def test_top_k_must_match(self):
+        """测试不同top_k不命中"""
+        cache = SemanticQueryCache()
+        cache.put(_unit([1.0, 0.0]), 3, _results("a"))
+
+        assert cache.get(_unit([1.0, 0.0]), 5) is None
+
+    def test_returns_copies(self):
+        """测试返回结果的修改不影响缓存"""
+        cache = SemanticQueryCache()
+        cache.put(_unit([1.0, 0.0]), 3, _results("原文"))
+
+        cache.get(_unit([1.0, 0.0]), 3)[0].content = "已修改"
+        assert cache.get(_unit([1.0, 0.0]), 3)[0].content == "原文"
+
+    def test_lru_eviction(self):
+        """测试容量满时淘汰最久未使用的条目"""
+        cache = SemanticQueryCache(capacity=2)
+        cache.put(_unit([1.0, 0.0, 0.0]), 3, _results("a"))
+        cache.put(_unit([0.0, 1.0, 0.0]), 3, _results("b"))
+
+        # 访问a，使b成为最久未使用
+        assert cache.get(_unit([1.0, 0.0, 0.0]), 3) is not None
+        cache.put(_unit([0.0, 0.0, 1.0]), 3, _results("c"))
+
+        assert len(cache) == 2
+        assert cache.get(_unit([0.0, 1.0, 0.0]), 3) is None
+        assert cache.get(_unit([1.0, 0.0, 0.0]), 3)[0].content == "a"
+        assert cache.get(_unit([0.0, 0.0, 1.0]), 3)[0].content == "c"
+
+    def test_ttl_expiry(self, monkeypatch):
+        """测试过期条目失效"""
+        now = [1000.0]
+        monkeypatch.setattr("src.query_cache.time.monotonic", lambda: now[0])
+
+        cache = SemanticQueryCache(ttl=300)
+        cache.put(_unit([1.0, 0.0]), 3, _results("a"))
+
+        now[0] += 299
+        assert cache.get(_unit([1.0, 0.0]), 3) is not None
+
+        now[0] += 2
+        assert cache.get(_unit([1.0, 0.0]), 3) is None
+        assert len(cache) == 0
+
+    def test_clear(self):
+        """测试清空缓存"""
+        cache = SemanticQueryCache()
+        cache.put(_unit([1.0, 0.0]), 3, _results("a"))
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.get(_unit([1.0, 0.0]), 3) is None
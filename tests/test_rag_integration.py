@@ -1,24 +1,99 @@
-#!/usr/bin/env python3
 """
 RAG系统集成测试
 测试BGE向量化器与Qdrant检索器的完整集成
+
+各测试基于异步检索器（需要pytest-asyncio），可用pytest-xdist并行运行：
+    pytest -n auto tests/test_rag_integration.py
 """
 
+import asyncio
+import functools
+import os
 import time
-from typing import List
+from contextlib import contextmanager
+from typing import Any, Dict, List, Sequence, Tuple
 import numpy as np
+import pytest
 
-from src.embeddings import BGEEmbedder, embed_text
-from src.retrievers import QdrantRetriever, create_retriever
+from src.embeddings import get_default_embedder
+from src.retrievers import AsyncQdrantRetriever, QdrantRetriever
 from src.model import DocumentChunk, SearchResult
 
 
-def create_sample_documents() -> List[DocumentChunk]:
-    """创建测试文档数据"""
+# 性能测试文档：只有编号不同，导入时生成一次
+_PERF_TEMPLATE = (
+    "这是第{i}个测试文档。内容包含麒麟操作系统的各种功能介绍，"
+    "包括但不限于系统管理、办公软件、网络功能、安全特性等方面的详细描述。"
+    "文档编号为{i:04d}，属于性能测试的一部分。"
+)
+_PERF_CONTENTS = tuple(_PERF_TEMPLATE.format(i=i) for i in range(100))
+
+# 设置环境变量 VERBOSE 时逐条输出检索结果
+_VERBOSE = bool(os.getenv("VERBOSE"))
+
+
+def _assert_ranked(results: List[SearchResult], top_k: int) -> None:
+    """检查结果数量不超过top_k，且按相似度降序排列"""
+    assert len(results) <= top_k
+    scores = np.fromiter((r.score for r in results), dtype=np.float32, count=len(results))
+    assert (np.diff(scores) <= 0).all(), "scores not monotonically decreasing"
+
+
+@contextmanager
+def timed(name: str, acc: Dict[str, int]):
+    """将代码块耗时（纳秒）累加到 acc[name]"""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        acc[name] = acc.get(name, 0) + time.perf_counter_ns() - start
+
+
+# 各测试并发运行时共用一个模型，同一时刻只允许一个前向计算
+_EMBED_LOCK = asyncio.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _embed_corpus(contents: Tuple[str, ...]) -> np.ndarray:
+    """批量向量化一组文本，相同语料在各测试间复用同一结果"""
+    embeddings = get_default_embedder().embed(list(contents))
+    embeddings.flags.writeable = False  # 结果被多个测试共享
+    return embeddings
+
+
+async def _embed(contents: Tuple[str, ...]) -> np.ndarray:
+    """在线程池中向量化，不阻塞其他测试的检索请求"""
+    async with _EMBED_LOCK:
+        return await asyncio.to_thread(_embed_corpus, contents)
+
+
+async def _embed_and_index(retriever: AsyncQdrantRetriever, contents: Sequence[str],
+                           metadatas: List[Dict[str, Any]], batch_size: int = 16) -> None:
+    """向量化与写入流水线：写入上一批的同时向量化下一批"""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+    
+    async def produce():
+        for start in range(0, len(contents), batch_size):
+            batch = tuple(contents[start:start + batch_size])
+            await queue.put((batch, metadatas[start:start + batch_size], await _embed(batch)))
+        await queue.put(None)
+    
+    async def consume():
+        while (item := await queue.get()) is not None:
+            await retriever.add_documents_fused(*item)
+    
+    # 任一方失败时TaskGroup取消另一方，不会阻塞在队列上
+    async with asyncio.TaskGroup() as group:
+        group.create_task(produce())
+        group.create_task(consume())
+
+
+async def create_sample_documents() -> Tuple[Tuple[str, ...], List[Dict[str, Any]], np.ndarray]:
+    """创建测试文档数据，按列返回内容、元数据和向量矩阵"""
     print("📚 准备测试文档...")
     
     # 准备测试文档内容（关于麒麟操作系统的信息）
-    test_contents = [
+    test_contents = (
         "麒麟操作系统是一个基于Linux内核的桌面操作系统，专为中国用户设计开发。",
         "Kylin OS具有良好的安全性和稳定性，支持国产化软硬件生态。",
         "该系统提供友好的用户界面，操作简单直观，适合办公和日常使用。",
@@ -29,55 +104,51 @@ def create_sample_documents() -> List[DocumentChunk]:
         "麒麟OS支持多种输入法，特别针对中文输入进行了优化。",
         "该系统具有优秀的硬件兼容性，支持多种主流硬件设备。",
         "麒麟操作系统定期更新，持续改进功能和修复安全漏洞。"
-    ]
+    )
     
     print(f"创建了 {len(test_contents)} 个文档片段")
     
-    # 使用BGE生成向量
-    embedder = BGEEmbedder()
-    embeddings = embedder.embed(test_contents)
-    
-    # 创建DocumentChunk对象
-    chunks = []
-    for i, (content, embedding) in enumerate(zip(test_contents, embeddings)):
-        chunk = DocumentChunk(
-            content=content,
-            metadata={
-                "doc_id": f"doc_{i:03d}",
-                "source": "kylin_system_manual",
-                "section": f"section_{i // 3 + 1}",  # 每3个文档一个章节
-                "content_type": "text",
-                "language": "zh-cn",
-                "created_at": "2024-01-15T10:00:00Z",
-                "word_count": len(content)
-            },
-            embedding=embedding
-        )
-        chunks.append(chunk)
-    
-    print(f"✅ 成功创建 {len(chunks)} 个文档块，每个向量维度为 {len(embeddings[0])}")
-    return chunks
-
-
-def test_basic_functionality():
+    # 使用BGE生成向量（各测试共享同一份向量）
+    embeddings = await _embed(test_contents)
+    
+    # 元数据与向量矩阵按列组织，写入时无需逐个构造DocumentChunk
+    metadatas = [
+        {
+            "doc_id": f"doc_{i:03d}",
+            "source": "kylin_system_manual",
+            "section": f"section_{i // 3 + 1}",  # 每3个文档一个章节
+            "content_type": "text",
+            "language": "zh-cn",
+            "created_at": "2024-01-15T10:00:00Z",
+            "word_count": len(content)
+        }
+        for i, content in enumerate(test_contents)
+    ]
+    
+    print(f"✅ 成功创建 {len(test_contents)} 个文档块，每个向量维度为 {embeddings.shape[1]}")
+    return test_contents, metadatas, embeddings
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_basic_functionality(make_retriever):
     """测试基本功能"""
     print("\n🧪 测试基本功能...")
     
     # 创建检索器
-    retriever = create_retriever(collection_name="test_basic", vector_size=1024)
+    retriever = make_retriever("test_basic")
     
     # 创建测试文档
-    chunks = create_sample_documents()
+    contents, metadatas, embeddings = await create_sample_documents()
     
     # 添加文档
     print("📥 添加文档到向量数据库...")
-    start_time = time.time()
-    retriever.add_documents(chunks)
-    add_time = time.time() - start_time
-    print(f"✅ 文档添加完成，耗时: {add_time:.2f}秒")
+    timings: Dict[str, int] = {}
+    with timed("add", timings):
+        await retriever.add_documents_fused(contents, metadatas, embeddings)
+    print(f"✅ 文档添加完成，耗时: {timings['add'] / 1e9:.2f}秒")
     
     # 查看集合信息
-    collection_info = retriever.get_collection_info()
+    collection_info = await retriever.get_collection_info()
     print("📊 集合信息:")
     for key, value in collection_info.items():
         print(f"  {key}: {value}")
@@ -91,46 +162,48 @@ def test_basic_functionality():
         "支持什么输入法？"
     ]
     
-    embedder = BGEEmbedder()
+    # 一次前向计算生成全部查询向量
+    query_embeddings = await _embed(tuple(test_queries))
     
-    for query in test_queries:
-        print(f"\n查询: {query}")
-        
-        # 生成查询向量
-        query_embedding = embedder.embed(query)[0]
-        
-        # 执行检索
-        start_time = time.time()
-        results = retriever.search(query_embedding, top_k=3)
-        search_time = time.time() - start_time
+    # 计时区间内只执行检索，结果在全部检索完成后统一输出
+    all_results = []
+    for query_embedding in query_embeddings:
+        with timed("search", timings):
+            all_results.append(await retriever.search(query_embedding, top_k=3))
+    
+    search_ms = timings["search"] / 1e6
+    print(f"检索耗时: 共{search_ms:.2f}毫秒，平均{search_ms / len(test_queries):.3f}毫秒")
+    
+    for query, results in zip(test_queries, all_results):
+        _assert_ranked(results, top_k=3)
+        if not _VERBOSE:
+            continue
         
-        print(f"检索耗时: {search_time*1000:.1f}毫秒")
+        print(f"\n查询: {query}")
         print(f"找到 {len(results)} 个结果:")
-        
         for i, result in enumerate(results, 1):
             print(f"  {i}. [相似度: {result.score:.4f}] {result.content[:50]}...")
             print(f"     元数据: doc_id={result.metadata.get('doc_id')}, "
                   f"section={result.metadata.get('section')}")
 
 
-def test_filtered_search():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_filtered_search(make_retriever):
     """测试过滤检索"""
     print("\n🧪 测试过滤检索...")
     
-    retriever = create_retriever(collection_name="test_filtered", vector_size=1024)
-    chunks = create_sample_documents()
-    retriever.add_documents(chunks)
+    retriever = make_retriever("test_filtered")
+    await retriever.add_documents_fused(*await create_sample_documents())
     
-    embedder = BGEEmbedder()
     query = "系统功能介绍"
-    query_embedding = embedder.embed(query)[0]
+    query_embedding = (await _embed((query,)))[0]
     
     # 不过滤的检索
-    all_results = retriever.search(query_embedding, top_k=5)
+    all_results = await retriever.search(query_embedding, top_k=5)
     print(f"无过滤检索: 找到 {len(all_results)} 个结果")
     
     # 按章节过滤
-    filtered_results = retriever.search_with_filter(
+    filtered_results = await retriever.search_with_filter(
         query_embedding, 
         top_k=5,
         metadata_filter={"section": "section_1"}
@@ -141,84 +214,70 @@ def test_filtered_search():
         print(f"  - {result.content[:40]}... (section: {result.metadata['section']})")
 
 
-def test_error_handling():
-    """测试错误处理"""
-    print("\n🧪 测试错误处理...")
-    
-    retriever = create_retriever(collection_name="test_errors", vector_size=1024)
-    
-    # 测试空文档列表
-    try:
-        retriever.add_documents([])
-        print("✅ 正确处理空文档列表")
-    except Exception as e:
-        print(f"❌ 处理空文档列表失败: {e}")
-    
-    # 测试缺少embedding的文档
-    try:
-        bad_chunk = DocumentChunk(
-            content="测试内容",
-            metadata={"test": "value"},
-            embedding=None
-        )
-        retriever.add_documents([bad_chunk])
-        print("❌ 应该拒绝缺少embedding的文档")
-    except ValueError as e:
-        print(f"✅ 正确拒绝缺少embedding的文档: {e}")
-    
-    # 测试维度不匹配的查询
-    try:
-        wrong_dim_vector = [0.1] * 512  # 错误的维度
-        retriever.search(wrong_dim_vector, top_k=3)
-        print("❌ 应该拒绝错误维度的查询向量")
-    except ValueError as e:
-        print(f"✅ 正确拒绝错误维度的查询向量: {e}")
-    
-    # 测试空查询向量
-    try:
-        retriever.search([], top_k=3)
-        print("❌ 应该拒绝空查询向量")
-    except ValueError as e:
-        print(f"✅ 正确拒绝空查询向量: {e}")
+# 错误处理用例：(用例名, 对检索器执行的操作, 期望的异常类型，None表示不应抛出异常)
+_ERROR_CASES = [
+    ("empty_documents", lambda r: r.add_documents([]), None),
+    ("missing_embedding",
+     lambda r: r.add_documents([DocumentChunk(content="测试内容", metadata={"test": "value"}, embedding=None)]),
+     ValueError),
+    ("wrong_dimension", lambda r: r.search([0.1] * 512, top_k=3), ValueError),
+    ("empty_query", lambda r: r.search([], top_k=3), ValueError),
+]
+
 
+@pytest.fixture(scope="module")
+def error_retriever() -> QdrantRetriever:
+    """错误处理用例共用的检索器（内存模式，每个进程独立，可配合pytest-xdist运行）"""
+    return QdrantRetriever(collection_name="test_errors", vector_size=1024)
 
-def test_performance():
-    """测试性能"""
+
+@pytest.mark.parametrize("case_name, action, expected_exc", _ERROR_CASES,
+                         ids=[case[0] for case in _ERROR_CASES])
+def test_error_handling(error_retriever, case_name, action, expected_exc):
+    """测试错误处理：非法输入在访问存储前被拒绝"""
+    if expected_exc is None:
+        action(error_retriever)
+    else:
+        with pytest.raises(expected_exc):
+            action(error_retriever)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_vector_size_mismatch(make_retriever):
+    """测试已有集合的向量维度与异步检索器不一致时拒绝读写"""
+    existing = make_retriever("test_size_mismatch", vector_size=8)
+    await existing.clear_collection()  # 按8维创建集合
+    
+    retriever = make_retriever("test_size_mismatch", vector_size=16)
+    with pytest.raises(ValueError):
+        await retriever.search(np.ones(16, dtype=np.float32), top_k=1)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_performance(make_retriever, sequential):
+    """
+    测试性能
+    
+    Args:
+        sequential: --sequential选项，逐条调用search检索（测量单次延迟），默认用search_many一次提交全部查询
+    """
     print("\n🧪 测试性能...")
     
-    retriever = create_retriever(collection_name="test_performance", vector_size=1024)
+    retriever = make_retriever("test_performance", quantization="int8")  # 覆盖生产环境的int8量化配置
     
     # 创建大量测试文档
     print("生成大量测试文档...")
-    large_contents = [
-        f"这是第{i}个测试文档。内容包含麒麟操作系统的各种功能介绍，"
-        f"包括但不限于系统管理、办公软件、网络功能、安全特性等方面的详细描述。"
-        f"文档编号为{i:04d}，属于性能测试的一部分。"
-        for i in range(100)
+    large_contents = _PERF_CONTENTS
+    
+    large_metadatas = [
+        {"doc_id": f"perf_{i:04d}", "batch": "performance_test"} for i in range(len(large_contents))
     ]
     
-    embedder = BGEEmbedder()
-    print("生成向量...")
-    start_time = time.time()
-    large_embeddings = embedder.embed(large_contents)
-    embedding_time = time.time() - start_time
-    print(f"✅ 生成100个向量耗时: {embedding_time:.2f}秒")
-    
-    large_chunks = []
-    for i, (content, embedding) in enumerate(zip(large_contents, large_embeddings)):
-        chunk = DocumentChunk(
-            content=content,
-            metadata={"doc_id": f"perf_{i:04d}", "batch": "performance_test"},
-            embedding=embedding
-        )
-        large_chunks.append(chunk)
-    
-    # 批量添加文档
-    print("批量添加文档...")
-    start_time = time.time()
-    retriever.add_documents(large_chunks)
-    add_time = time.time() - start_time
-    print(f"✅ 批量添加100个文档耗时: {add_time:.2f}秒")
+    # 分批向量化并写入，两个阶段通过队列重叠执行
+    print("向量化并批量添加文档...")
+    timings: Dict[str, int] = {}
+    with timed("index", timings):
+        await _embed_and_index(retriever, large_contents, large_metadatas)
     
     # 批量检索测试
     print("批量检索测试...")
@@ -230,30 +289,41 @@ def test_performance():
         "用户界面设计"
     ]
     
-    query_embeddings = embedder.embed(test_queries)
+    query_embeddings = await _embed(tuple(test_queries))
     
-    start_time = time.time()
-    total_results = 0
-    for query_emb in query_embeddings:
-        results = retriever.search(query_emb, top_k=5)
-        total_results += len(results)
-    search_time = time.time() - start_time
+    with timed("search", timings):
+        if sequential:
+            batch_results = [await retriever.search(query_emb, top_k=5) for query_emb in query_embeddings]
+        else:
+            batch_results = await retriever.search_many(query_embeddings, top_k=5)
+    total_results = sum(len(results) for results in batch_results)
     
-    print(f"✅ 5次检索总耗时: {search_time:.2f}秒")
-    print(f"✅ 平均单次检索: {search_time/5*1000:.1f}毫秒")
+    # 计时结束后统一输出
+    search_ms = timings["search"] / 1e6
+    print(f"✅ 向量化并添加{len(large_contents)}个文档耗时: {timings['index'] / 1e9:.2f}秒")
+    print(f"✅ {len(test_queries)}次检索总耗时: {search_ms:.2f}毫秒")
+    print(f"✅ 平均单次检索: {search_ms / len(test_queries):.3f}毫秒")
     print(f"✅ 总检索结果数: {total_results}")
     
     # 显示最终集合状态
-    final_info = retriever.get_collection_info()
+    final_info = await retriever.get_collection_info()
     print(f"✅ 最终集合状态: {final_info['points_count']} 个文档")
+    assert final_info["points_count"] == len(large_contents)
+    assert final_info["quantization"] == "int8", "性能测试集合应启用int8标量量化"
 
 
-def test_integration_scenario():
-    """测试完整的RAG场景"""
+@pytest.mark.asyncio(loop_scope="module")
+async def test_integration_scenario(make_retriever, sequential):
+    """
+    测试完整的RAG场景
+    
+    Args:
+        sequential: --sequential选项，逐条调用search检索，默认用search_many一次提交全部问题
+    """
     print("\n🧪 测试完整RAG场景...")
     
     # 创建专门的检索器
-    retriever = create_retriever(collection_name="rag_demo", vector_size=1024)
+    retriever = make_retriever("rag_demo")
     
     # 模拟文档知识库
     knowledge_base = [
@@ -271,25 +341,21 @@ def test_integration_scenario():
     
     # 构建知识库
     print("构建知识库...")
-    embedder = BGEEmbedder()
-    kb_embeddings = embedder.embed(knowledge_base)
-    
-    kb_chunks = []
-    for i, (content, embedding) in enumerate(zip(knowledge_base, kb_embeddings)):
-        chunk = DocumentChunk(
-            content=content,
-            metadata={
-                "doc_id": f"kb_{i:03d}",
-                "source": "kylin_knowledge_base",
-                "topic": ["system", "security", "software", "hardware", "network"][i % 5],
-                "priority": "high" if i < 5 else "normal"
-            },
-            embedding=embedding
-        )
-        kb_chunks.append(chunk)
-    
-    retriever.add_documents(kb_chunks)
-    print(f"✅ 知识库构建完成，包含 {len(kb_chunks)} 个条目")
+    kb_embeddings = await _embed(tuple(knowledge_base))
+    
+    topics = ["system", "security", "software", "hardware", "network"]
+    kb_metadatas = [
+        {
+            "doc_id": f"kb_{i:03d}",
+            "source": "kylin_knowledge_base",
+            "topic": topics[i % 5],
+            "priority": "high" if i < 5 else "normal"
+        }
+        for i in range(len(knowledge_base))
+    ]
+    
+    await retriever.add_documents_fused(knowledge_base, kb_metadatas, kb_embeddings)
+    print(f"✅ 知识库构建完成，包含 {len(knowledge_base)} 个条目")
     
     # 模拟用户问答
     print("\n模拟用户问答场景:")
@@ -301,15 +367,19 @@ def test_integration_scenario():
         "如何连接网络设备？"
     ]
     
-    for question in user_questions:
-        print(f"\n❓ 用户问题: {question}")
-        
-        # 生成问题向量
-        question_embedding = embedder.embed(question)[0]
-        
-        # 检索相关文档
-        relevant_docs = retriever.search(question_embedding, top_k=2)
+    # 生成问题向量并检索相关文档
+    question_embeddings = await _embed(tuple(user_questions))
+    if sequential:
+        all_relevant_docs = [await retriever.search(emb, top_k=2) for emb in question_embeddings]
+    else:
+        all_relevant_docs = await retriever.search_many(question_embeddings, top_k=2)
+    
+    for question, relevant_docs in zip(user_questions, all_relevant_docs):
+        _assert_ranked(relevant_docs, top_k=2)
+        if not _VERBOSE:
+            continue
         
+        print(f"\n❓ 用户问题: {question}")
         print("📋 检索到的相关信息:")
         for i, doc in enumerate(relevant_docs, 1):
             print(f"  {i}. [相似度: {doc.score:.4f}] {doc.content}")
@@ -317,38 +387,3 @@ def test_integration_scenario():
         
         # 在实际RAG系统中，这里会将检索到的内容传递给LLM生成答案
         print("💡 基于检索内容，系统可以生成针对性回答")
-
-
-def main():
-    """主测试函数"""
-    print("🚀 BGE + Qdrant RAG集成测试")
-    print("=" * 60)
-    
-    start_time = time.time()
-    
-    try:
-        test_basic_functionality()
-        test_filtered_search()
-        test_error_handling()
-        test_performance()
-        test_integration_scenario()
-        
-        total_time = time.time() - start_time
-        print(f"\n✅ 所有集成测试完成！总耗时: {total_time:.2f}秒")
-        
-        print(f"\n📊 测试总结:")
-        print(f"- ✅ 基本功能: BGE向量化 + Qdrant存储检索")
-        print(f"- ✅ 过滤检索: 支持元数据过滤条件")
-        print(f"- ✅ 错误处理: 完善的异常处理机制")
-        print(f"- ✅ 性能表现: 批量处理高效稳定")
-        print(f"- ✅ RAG场景: 完整的问答检索流程")
-        print(f"\n🎯 BGE + Qdrant 集成方案验证成功！")
-        
-    except Exception as e:
-        print(f"\n❌ 测试过程中出现错误: {e}")
-        import traceback
-        traceback.print_exc()
-
-
-if __name__ == "__main__":
-    main()
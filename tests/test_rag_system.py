@@ -0,0 +1,149 @@
+"""
+RAG系统文档处理测试
+验证单进程与多进程批量处理得到相同的分片并全部写入向量数据库，
+以及重复分片只向量化一次、向量按分片顺序展开
+"""
+
+import copy
+import time
+import zlib
+from typing import List
+
+import numpy as np
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from src.config import get_default_config
+from src.model import DocumentChunk
+from src.rag_system import RAGSystem, _group_duplicate_chunks, parse_and_chunk
+
+
+_VECTOR_SIZE = 8
+
+_PARAGRAPHS = [
+    "The Kylin desktop provides a software store for installing and updating applications.",
+    "Users can change the display resolution and scaling factor in the system settings.",
+    "Open a terminal and run the df command to check how much disk space is in use.",
+    "Network connections and the firewall are managed from the control panel.",
+    "The file manager supports tabs, bookmarks and previews of common document types.",
+    "Backups can be scheduled daily or weekly and restored from the recovery menu.",
+]
+
+
+class _HashEmbedder:
+    """按文本哈希生成确定性单位向量，测试时代替BGE模型，并记录每次调用的文本"""
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        vectors = np.array([
+            np.random.default_rng(zlib.crc32(text.encode("utf-8"))).normal(size=_VECTOR_SIZE)
+            for text in texts
+        ], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _write_pdf(path, paragraphs: List[str]) -> None:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(72, 72, 540, 770), "\n".join(paragraphs * 3), fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.fixture
+def pdf_files(tmp_path) -> List[str]:
+    """两份内容不同的单页PDF"""
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"manual_{i}.pdf"
+        _write_pdf(path, _PARAGRAPHS[i:] + _PARAGRAPHS[:i])
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def rag_system(tmp_path) -> RAGSystem:
+    """使用内存模式Qdrant和哈希向量化器的RAG系统"""
+    config = copy.deepcopy(get_default_config())
+    config['parser']['output_dir'] = str(tmp_path / "processed")
+    config['chunker']['chunk_size'] = 300
+    config['retriever']['vector_size'] = _VECTOR_SIZE
+    system = RAGSystem(config)
+    system.embedder = _HashEmbedder()
+    return system
+
+
+def _point_count(system: RAGSystem) -> int:
+    return system.retriever.client.count(system.retriever.collection_name).count
+
+
+def test_parse_and_chunk(pdf_files, rag_system):
+    """测试模块级解析分片函数"""
+    chunks, metadata = parse_and_chunk(pdf_files[0], rag_system.config)
+
+    assert len(chunks) > 1
+    assert metadata['page_count'] == 1
+    assert metadata['file_name'] == "manual_0.pdf"
+    assert all(chunk.content.strip() for chunk in chunks)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_documents(pdf_files, rag_system, workers):
+    """测试单进程和进程池批量处理：结果按输入顺序返回，分片全部写入"""
+    expected = [len(parse_and_chunk(path, rag_system.config)[0]) for path in pdf_files]
+
+    results = rag_system.process_documents(pdf_files, workers=workers)
+
+    assert [result["document_path"] for result in results] == pdf_files
+    assert [result["chunks_created"] for result in results] == expected
+    assert all(result["success"] for result in results)
+    assert rag_system.document_count == 2
+    assert rag_system.chunk_count == sum(expected)
+    assert _point_count(rag_system) == sum(expected)
+
+
+def _chunks(contents: List[str]) -> List[DocumentChunk]:
+    return [DocumentChunk(content=c, metadata={"chunk_index": i}) for i, c in enumerate(contents)]
+
+
+def test_group_duplicate_chunks():
+    """测试按内容分组，组按首次出现的顺序排列"""
+    groups = _group_duplicate_chunks(_chunks(["甲", "乙", "甲", "丙", "乙", "甲"]))
+    assert groups == [[0, 2, 5], [1, 4], [3]]
+
+
+def test_index_chunks_fans_out_duplicates(rag_system):
+    """测试重复分片只向量化一次，写入时向量按分片顺序展开并各自保留元数据"""
+    rag_system.config['embedder']['batch_size'] = 1
+    rag_system.config['embedder']['index_batches'] = 2
+    added = []
+    rag_system.retriever.add_documents = lambda chunks, embeddings: added.append((chunks, embeddings))
+    chunks = _chunks(["甲", "乙", "甲", "丙", "乙", "甲"])
+
+    result = rag_system._index_chunks("doc.pdf", chunks, {}, time.time())
+
+    # 每段2组：[甲, 乙]、[丙]
+    assert rag_system.embedder.calls == [["甲", "乙"], ["丙"]]
+    assert result["unique_chunks"] == 3
+    assert [[c.metadata["chunk_index"] for c in batch] for batch, _ in added] == [[0, 2, 5, 1, 4], [3]]
+
+    reference = _HashEmbedder()
+    for batch, embeddings in added:
+        assert embeddings.shape == (len(batch), _VECTOR_SIZE)
+        np.testing.assert_array_equal(embeddings, reference.embed([c.content for c in batch]))
+
+
+def test_update_config_rebuilds_query_caches(rag_system):
+    """测试更新query配置时按新配置重建查询缓存，已缓存的查询向量被丢弃"""
+    assert rag_system.query_cache is None
+    rag_system._query_embedding_cache["麒麟"] = np.zeros(_VECTOR_SIZE, dtype=np.float32)
+
+    rag_system.update_config({'query': {'cache_size': 8, 'embedding_cache_size': 4}})
+
+    assert rag_system.query_cache is not None
+    assert len(rag_system._query_embedding_cache) == 0
+    assert rag_system._query_embedding_cache_size == 4
@@ -4,26 +4,43 @@ SimpleOverlapChunker测试用例
 
 import pytest
 from src.chunkers import SimpleOverlapChunker
+from src.chunkers._codegen import build_span_function
 from src.model import ParsedDocument, DocumentChunk
 
 
+# 各测试共用的参考文本
+_DOC_150_CN = "这是一个测试文档内容。" * 15  # 约150字符
+_DOC_150_DIGITS = "0123456789" * 15  # 150个字符
+_DOC_80_CN = "测试内容" * 20  # 80个字符
+
+
+def _document(content: str) -> ParsedDocument:
+    return ParsedDocument(
+        markdown_content=content,
+        images=[],
+        tables=[],
+        metadata={"source": "test.txt"}
+    )
+
+
+@pytest.fixture(scope="module")
+def documents():
+    """预先构造的测试文档（分片器不修改文档，可在测试间共享）"""
+    return {
+        "cn": _document(_DOC_150_CN),
+        "digits": _document(_DOC_150_DIGITS),
+        "cn_short": _document(_DOC_80_CN),
+    }
+
+
 class TestSimpleOverlapChunker:
     """SimpleOverlapChunker测试类"""
     
-    def test_basic_chunking(self):
+    def test_basic_chunking(self, documents):
         """测试基本分片功能"""
-        # 创建测试文档（150个字符）
-        content = "这是一个测试文档内容。" * 15  # 约150字符
-        document = ParsedDocument(
-            markdown_content=content,
-            images=[],
-            tables=[],
-            metadata={"source": "test.txt"}
-        )
-        
         # 使用默认配置（100字，重叠20字）
         chunker = SimpleOverlapChunker()
-        chunks = chunker.chunk(document)
+        chunks = chunker.chunk(documents["cn"])
         
         # 验证分片数量
         assert len(chunks) >= 1
@@ -34,19 +51,10 @@ class TestSimpleOverlapChunker:
             assert chunk.content
             assert "chunk_index" in chunk.metadata
     
-    def test_overlap_functionality(self):
+    def test_overlap_functionality(self, documents):
         """测试重叠功能"""
-        # 创建简单测试内容
-        content = "0123456789" * 15  # 150个字符
-        document = ParsedDocument(
-            markdown_content=content,
-            images=[],
-            tables=[],
-            metadata={"source": "test.txt"}
-        )
-        
         chunker = SimpleOverlapChunker(chunk_size=50, overlap_size=10)
-        chunks = chunker.chunk(document)
+        chunks = chunker.chunk(documents["digits"])
         
         # 验证至少有2个分片
         assert len(chunks) >= 2
@@ -61,25 +69,18 @@ class TestSimpleOverlapChunker:
             assert len(first_chunk_end) > 0
             assert len(second_chunk_start) > 0
     
-    def test_custom_parameters(self):
+    @pytest.mark.parametrize("chunk_size, overlap_size", [(30, 5), (50, 10), (20, 0)])
+    def test_custom_parameters(self, documents, chunk_size, overlap_size):
         """测试自定义参数"""
-        content = "测试内容" * 20
-        document = ParsedDocument(
-            markdown_content=content,
-            images=[],
-            tables=[],
-            metadata={"source": "test.txt"}
-        )
-        
-        # 自定义参数：30字分片，5字重叠
-        chunker = SimpleOverlapChunker(chunk_size=30, overlap_size=5)
-        chunks = chunker.chunk(document)
+        chunker = SimpleOverlapChunker(chunk_size=chunk_size, overlap_size=overlap_size)
+        chunks = chunker.chunk(documents["cn_short"])
         
         # 验证分片参数
         info = chunker.get_info()
-        assert info["chunk_size"] == 30
-        assert info["overlap_size"] == 5
-        assert info["step_size"] == 25
+        assert info["chunk_size"] == chunk_size
+        assert info["overlap_size"] == overlap_size
+        assert info["step_size"] == chunk_size - overlap_size
+        assert all(len(chunk.content) <= chunk_size for chunk in chunks)
     
     def test_metadata_preservation(self):
         """测试元数据保持"""
@@ -104,15 +105,88 @@ class TestSimpleOverlapChunker:
             assert "chunk_index" in chunk.metadata
             assert "start_position" in chunk.metadata
     
-    def test_invalid_parameters(self):
-        """测试无效参数"""
-        with pytest.raises(ValueError):
-            # 重叠大小等于分片大小
-            SimpleOverlapChunker(chunk_size=100, overlap_size=100)
+    def test_chunk_positions(self, documents):
+        """测试分片窗口位置"""
+        chunker = SimpleOverlapChunker(chunk_size=50, overlap_size=10)
+        chunks = chunker.chunk(documents["digits"])
+        
+        # 步长40：窗口起点为0, 40, 80, 120
+        assert [c.metadata["start_position"] for c in chunks] == [0, 40, 80, 120]
+        assert [c.metadata["end_position"] for c in chunks] == [50, 90, 130, 150]
+        assert [c.metadata["chunk_index"] for c in chunks] == [0, 1, 2, 3]
+        assert chunks[0].metadata["overlap_size"] == 0
+        assert chunks[1].metadata["overlap_size"] == 10
+        assert chunks[-1].content == _DOC_150_DIGITS[120:150]
+    
+    def test_metadata_shared_across_chunks(self):
+        """测试原文档元数据在分片间共享"""
+        document = ParsedDocument(
+            markdown_content=_DOC_150_DIGITS,
+            images=[],
+            tables=[],
+            metadata={"source": "test.txt", "file_name": "test.pdf"}
+        )
+        
+        chunker = SimpleOverlapChunker(chunk_size=50, overlap_size=10)
+        chunks = chunker.chunk(document)
+        
+        # 分片字段各自独立，原文档元数据只保存一份
+        assert chunks[0].metadata.maps[1] is chunks[1].metadata.maps[1]
+        assert chunks[0].metadata["chunk_index"] != chunks[1].metadata["chunk_index"]
+        assert dict(chunks[1].metadata)["file_name"] == "test.pdf"
+
+    def test_content_is_stripped_view(self):
+        """测试分片内容为共享源文本上去除首尾空白的视图"""
+        content = "  abc  " + " " * 10 + "def  "
+        document = ParsedDocument(
+            markdown_content=content,
+            images=[],
+            tables=[],
+            metadata={"source": "test.txt"}
+        )
+
+        chunker = SimpleOverlapChunker(chunk_size=7, overlap_size=0)
+        chunks = chunker.chunk(document)
+
+        # 中间的纯空白窗口被跳过
+        assert [c.content for c in chunks] == ["abc", "def"]
+        assert [c.metadata["chunk_size"] for c in chunks] == [3, 3]
+        assert chunks[0]._source is chunks[1]._source
+        assert chunks[0].to_dict()["content"] == "abc"
+    
+    def test_chunk_equality_repr_and_setter(self):
+        """测试分片按内容比较（与源文本视图无关、可含NumPy向量），repr包含内容，content可赋值"""
+        import numpy as np
+        
+        view = DocumentChunk.from_span("  abc  ", 2, 5, {"chunk_index": 0})
+        view.embedding = np.ones(4, dtype=np.float32)
+        chunk = DocumentChunk(content="abc", metadata={"chunk_index": 0}, embedding=np.ones(4))
         
+        assert view == chunk
+        assert view != DocumentChunk(content="abc", metadata={"chunk_index": 0})
+        assert "'abc'" in repr(view)
+        
+        view.content = "def"
+        assert view.content == "def"
+        assert view.to_dict()["content"] == "def"
+
+    def test_specialized_spans_match_window_kernel(self):
+        """测试运行时生成的区间函数与窗口内核结果一致（含全角空格、不换行空格和非BMP字符）"""
+        content = ("麒麟系统  \n\n" + "0123456789" * 7 + "\u3000\xa0 \U0001F600" + " " * 40) * 5
+        chunker = SimpleOverlapChunker(chunk_size=30, overlap_size=8)
+        
+        specialized = build_span_function(30, 22)
+        assert specialized(content) == chunker._compute_spans_windows(content)
+        assert build_span_function(30, 22) is specialized
+    
+    @pytest.mark.parametrize("chunk_size, overlap_size", [
+        (100, 100),  # 重叠大小等于分片大小
+        (50, 60),    # 重叠大小大于分片大小
+    ])
+    def test_invalid_parameters(self, chunk_size, overlap_size):
+        """测试无效参数"""
         with pytest.raises(ValueError):
-            # 重叠大小大于分片大小
-            SimpleOverlapChunker(chunk_size=50, overlap_size=60)
+            SimpleOverlapChunker(chunk_size=chunk_size, overlap_size=overlap_size)
     
     def test_empty_document(self):
         """测试空文档"""
@@ -0,0 +1,100 @@
+"""
+sqlite-vec检索器测试
+验证写入与检索、int8量化、元数据过滤、清空和删除（未安装sqlite-vec时跳过）
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sqlite_vec")
+
+from src.model import DocumentChunk
+from src.retrievers import SqliteVecRetriever
+from src.retrievers.sqlite_vec_retriever import row_id
+
+
+def _unit_rows(count: int, dim: int) -> np.ndarray:
+    vectors = np.random.default_rng(0).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _chunks(vectors: np.ndarray):
+    return [
+        DocumentChunk(content=f"文本{i}", metadata={"chunk_index": i, "section": "ab"[i % 2]},
+                      embedding=vector)
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def _make_retriever(**options) -> SqliteVecRetriever:
+    try:
+        return SqliteVecRetriever(collection_name="test_chunks", vector_size=8, **options)
+    except RuntimeError as e:  # Python未编译扩展加载支持
+        pytest.skip(str(e))
+
+
+class TestSqliteVecRetriever:
+    """sqlite-vec检索器测试用例"""
+
+    def test_add_and_search(self):
+        """测试写入后检索自身向量排在首位"""
+        retriever = _make_retriever()
+        vectors = _unit_rows(4, 8)
+        retriever.add_documents(_chunks(vectors))
+
+        results = retriever.search(vectors[1], top_k=2)
+        assert len(results) == 2
+        assert results[0].metadata["chunk_index"] == 1
+        assert results[0].score == pytest.approx(1.0, abs=1e-5)
+        assert results[0].score >= results[1].score
+
+    def test_readd_does_not_duplicate(self):
+        """测试重复写入同一批分片时覆盖原有的行"""
+        retriever = _make_retriever(upsert_batch_size=3)
+        chunks = _chunks(_unit_rows(4, 8))
+
+        retriever.add_documents(chunks)
+        retriever.add_documents(chunks + chunks[:1])
+        assert retriever.get_collection_info()["points_count"] == 4
+
+    def test_int8_quantization(self):
+        """测试int8量化存储：检索自身的相似度接近1"""
+        retriever = _make_retriever(quantization="int8")
+        vectors = _unit_rows(4, 8)
+        retriever.add_documents(_chunks(vectors))
+
+        results = retriever.search(vectors[2], top_k=1)
+        assert results[0].metadata["chunk_index"] == 2
+        assert results[0].score == pytest.approx(1.0, abs=0.05)
+
+    def test_search_with_filter(self):
+        """测试按元数据过滤（json_extract）"""
+        retriever = _make_retriever()
+        vectors = _unit_rows(4, 8)
+        retriever.add_documents(_chunks(vectors))
+
+        results = retriever.search_with_filter(vectors[0], top_k=4, metadata_filter={"section": "b"})
+        assert all(r.metadata["section"] == "b" for r in results)
+        assert len(results) == 2
+
+    def test_clear_collection(self):
+        """测试清空集合"""
+        retriever = _make_retriever()
+        vectors = _unit_rows(4, 8)
+        retriever.add_documents(_chunks(vectors))
+
+        retriever.clear_collection()
+        assert retriever.get_collection_info()["points_count"] == 0
+        assert retriever.search(vectors[0], top_k=3) == []
+
+    def test_delete_documents(self):
+        """测试按行ID删除分片"""
+        retriever = _make_retriever()
+        vectors = _unit_rows(4, 8)
+        chunks = _chunks(vectors)
+        retriever.add_documents(chunks)
+
+        retriever.delete_documents([row_id(chunks[1].content, dict(chunks[1].metadata))])
+        assert retriever.get_collection_info()["points_count"] == 3
+        results = retriever.search(vectors[1], top_k=4)
+        assert all(r.metadata["chunk_index"] != 1 for r in results)
@@ -0,0 +1,57 @@
+"""
+检索器向量整理测试
+验证向量矩阵的形状校验和非有限值检查
+"""
+
+import pytest
+import numpy as np
+
+from src.model import DocumentChunk
+from src.retrievers._vectors import stack_embeddings
+from src.retrievers._validate import first_non_finite_row, _first_non_finite_numpy
+
+
+def _chunks(embeddings):
+    return [DocumentChunk(content=f"文本{i}", metadata={}, embedding=e) for i, e in enumerate(embeddings)]
+
+
+class TestStackEmbeddings:
+    """向量整理测试用例"""
+
+    def test_stack_chunk_embeddings(self):
+        """测试从分片字段整理向量矩阵"""
+        vectors = stack_embeddings(_chunks([[0.1, 0.2], np.array([0.3, 0.4])]), None, 2)
+        assert vectors.dtype == np.float32
+        assert vectors.shape == (2, 2)
+
+    def test_missing_embedding(self):
+        """测试缺失向量时报告分片下标"""
+        with pytest.raises(ValueError, match="Chunk 1 is missing embedding vector"):
+            stack_embeddings(_chunks([[0.1, 0.2], None]), None, 2)
+
+    def test_dimension_mismatch(self):
+        """测试维度不匹配"""
+        with pytest.raises(ValueError, match="Chunk 0 embedding dimension"):
+            stack_embeddings(_chunks([[0.1, 0.2, 0.3]]), None, 2)
+        
+        with pytest.raises(ValueError, match="Embedding dimension"):
+            stack_embeddings(_chunks([None]), np.zeros((1, 3)), 2)
+
+    def test_non_finite_embedding(self):
+        """测试包含NaN的向量被拒绝"""
+        with pytest.raises(ValueError, match="Chunk 1 embedding contains NaN"):
+            stack_embeddings(_chunks([None, None]), np.array([[0.1, 0.2], [np.nan, 0.0]]), 2)
+
+    def test_first_non_finite_row(self):
+        """测试JIT内核与NumPy实现结果一致"""
+        vectors = np.zeros((4, 3), dtype=np.float32)
+        assert first_non_finite_row(vectors) == -1
+        
+        vectors[2, 1] = np.inf
+        assert first_non_finite_row(vectors) == 2
+        assert _first_non_finite_numpy(vectors) == 2
+
+    def test_first_non_finite_row_float16(self):
+        """测试半精度矩阵：超出float16范围的值转换后为无穷"""
+        vectors = np.array([[0.1, 0.2], [1e6, 0.0]], dtype=np.float32).astype(np.float16)
+        assert first_non_finite_row(vectors) == 1